@@ -1,5 +1,7 @@
 from django.contrib import admin
 
-from .models import Note
+from .models import Folder, Note, Tag
 
 admin.site.register(Note)
+admin.site.register(Folder)
+admin.site.register(Tag)
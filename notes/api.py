@@ -0,0 +1,286 @@
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import generic
+
+from .db import retry_on_locked
+from .exporters import CONTENT_TYPES, EXTENSIONS
+from .forms import NoteForm
+from .jobs import job_path
+from .models import NoteJob
+from .pagination import CursorPaginator
+from .ratelimit import rate_limit
+from .serializers import (
+    DETAIL_FIELDS, LIST_FIELDS, job_to_dict, note_to_dict
+)
+from .sync import changes_since
+from .views import NoteBase
+
+FORM_FIELDS = NoteForm.Meta.fields
+
+
+class ApiError(Exception):
+    """Ошибка запроса к API, отдаётся клиенту как JSON."""
+
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+@method_decorator(rate_limit('notes:write'), name='dispatch')
+class ApiBase(NoteBase, generic.View):
+    """Общая часть JSON API: те же правила доступа, что у страниц."""
+
+    default_fields = DETAIL_FIELDS
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            body = {'error': str(error)}
+            if error.errors is not None:
+                body['errors'] = error.errors
+            return JsonResponse(body, status=error.status)
+
+    def handle_no_permission(self):
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    def get_fields(self):
+        """Поля ответа из ?fields=id,slug,title."""
+        raw = self.request.GET.get('fields')
+        if not raw:
+            return self.default_fields
+        fields = tuple(field.strip() for field in raw.split(','))
+        unknown = set(fields) - set(DETAIL_FIELDS)
+        if unknown:
+            raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+        return fields
+
+    def get_body(self):
+        try:
+            return json.loads(self.request.body or b'null')
+        except ValueError as error:
+            raise ApiError(f'Некорректный JSON: {error}')
+
+    def get_note(self, slug, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+        try:
+            return queryset.get(slug=slug)
+        except self.model.DoesNotExist:
+            raise ApiError(f'Заметка {slug} не найдена', status=404)
+
+    def save_form(self, data, instance=None):
+        """Проверяет данные правилами NoteForm и сохраняет заметку."""
+        if not isinstance(data, dict):
+            raise ApiError('Ожидается JSON-объект')
+        if instance is not None:
+            # Частичное обновление: недостающие поля берутся из заметки.
+            data = {
+                **{field: getattr(instance, field) for field in FORM_FIELDS},
+                **data,
+            }
+        form = NoteForm(data=data, instance=instance)
+        if not form.is_valid():
+            raise ApiError('Ошибка в данных заметки', errors=form.errors)
+        note = form.save(commit=False)
+        if instance is None:
+            note.author = self.request.user
+        note.save()
+        return note
+
+
+@method_decorator(retry_on_locked, name='post')
+class NoteListApi(ApiBase):
+    """Список заметок и создание заметки."""
+
+    default_fields = LIST_FIELDS
+
+    def get(self, request, *args, **kwargs):
+        fields = self.get_fields()
+        queryset = self.get_queryset().organized(
+            tag=request.GET.get('tag'), folder=request.GET.get('folder')
+        ).only('id', *fields)
+        paginator = CursorPaginator(queryset, settings.NOTES_PAGE_SIZE)
+        try:
+            page = paginator.get_page(
+                after=request.GET.get('after'),
+                before=request.GET.get('before'),
+            )
+        except ValueError as error:
+            raise ApiError(str(error))
+        return JsonResponse({
+            'results': [note_to_dict(note, fields) for note in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+
+    def post(self, request, *args, **kwargs):
+        note = self.save_form(self.get_body())
+        return JsonResponse(note_to_dict(note, self.get_fields()), status=201)
+
+
+@method_decorator(retry_on_locked, name='patch')
+@method_decorator(retry_on_locked, name='put')
+@method_decorator(retry_on_locked, name='delete')
+class NoteDetailApi(ApiBase):
+    """Чтение, изменение и удаление одной заметки."""
+
+    def get(self, request, slug, *args, **kwargs):
+        fields = self.get_fields()
+        note = self.get_note(slug, self.get_queryset().only('id', *fields))
+        return JsonResponse(note_to_dict(note, fields))
+
+    def patch(self, request, slug, *args, **kwargs):
+        note = self.save_form(self.get_body(), self.get_note(slug))
+        return JsonResponse(note_to_dict(note, self.get_fields()))
+
+    put = patch
+
+    def delete(self, request, slug, *args, **kwargs):
+        # Заголовок и текст нужны, чтобы убрать заметку из индекса.
+        self.get_note(slug, self.get_queryset().only(
+            'id', 'slug', 'author', 'title', 'text'
+        )).delete()
+        return HttpResponse(status=204)
+
+
+@method_decorator(retry_on_locked, name='post')
+class NoteBatchApi(ApiBase):
+    """
+    Пакетные операции в одной транзакции.
+
+    Тело: {"create": [...], "update": [{"slug": ..., ...}],
+    "delete": [slug, ...]}. Ошибка в любой операции
+    отменяет весь пакет. Операций не больше NOTES_BATCH_LIMIT:
+    пакет держит блокировку записи SQLite, а тратит один жетон
+    ограничения частоты.
+    """
+
+    OPERATIONS = ('create', 'update', 'delete')
+
+    def post(self, request, *args, **kwargs):
+        create, update, slugs = self._operations(self.get_body())
+        fields = self.get_fields()
+        result = {'created': [], 'updated': [], 'deleted': 0}
+        with transaction.atomic():
+            for index, data in enumerate(create):
+                note = self._run(self.save_form, 'create', index, data)
+                result['created'].append(note_to_dict(note, fields))
+            for index, data in enumerate(update):
+                note = self._run(self._update, 'update', index, data)
+                result['updated'].append(note_to_dict(note, fields))
+            if slugs:
+                result['deleted'] = self._delete(slugs)
+        return JsonResponse(result)
+
+    def _operations(self, body):
+        """Списки операций пакета; форма тела проверяется до записи."""
+        if not isinstance(body, dict):
+            raise ApiError('Ожидается JSON-объект')
+        operations = [body.get(name, []) for name in self.OPERATIONS]
+        for name, items in zip(self.OPERATIONS, operations):
+            if not isinstance(items, list):
+                raise ApiError(f'{name}: ожидается список')
+        total = sum(len(items) for items in operations)
+        if total > settings.NOTES_BATCH_LIMIT:
+            raise ApiError(
+                f'Не больше {settings.NOTES_BATCH_LIMIT} операций в пакете'
+            )
+        for index, slug in enumerate(operations[-1]):
+            if not isinstance(slug, str):
+                raise ApiError(f'delete[{index}]: ожидается slug заметки')
+        return operations
+
+    def _run(self, operation, name, index, data):
+        try:
+            return operation(data)
+        except ApiError as error:
+            raise ApiError(
+                f'{name}[{index}]: {error}', error.status, error.errors
+            )
+
+    def _update(self, data):
+        if not isinstance(data, dict) or 'slug' not in data:
+            raise ApiError('Для изменения нужен slug заметки')
+        slug = data.pop('new_slug', None) or data['slug']
+        note = self.get_note(data.pop('slug'))
+        return self.save_form({**data, 'slug': slug}, note)
+
+    def _delete(self, slugs):
+        notes = list(self.get_queryset().filter(slug__in=slugs).only(
+            'id', 'slug', 'author', 'title', 'text'
+        ))
+        if len(notes) != len(set(slugs)):
+            raise ApiError('delete: заметки не найдены', status=404)
+        for note in notes:
+            # Удаление по одной: сигналы сбрасывают кэш списка.
+            note.delete()
+        return len(notes)
+
+
+class NoteSyncApi(ApiBase):
+    """Изменения заметок после курсора ?since=."""
+
+    def get(self, request, *args, **kwargs):
+        try:
+            feed = changes_since(
+                request.user,
+                request.GET.get('since'),
+                settings.NOTES_SYNC_PAGE_SIZE,
+            )
+        except ValueError as error:
+            raise ApiError(str(error))
+        return JsonResponse(feed)
+
+
+class JobApiBase(ApiBase):
+    """Фоновые задачи пользователя."""
+
+    def get_queryset(self):
+        return NoteJob.objects.filter(author=self.request.user)
+
+    def get_job(self, pk):
+        try:
+            return self.get_queryset().get(pk=pk)
+        except NoteJob.DoesNotExist:
+            raise ApiError('Задача не найдена', status=404)
+
+
+class NoteJobListApi(JobApiBase):
+    """Последние задачи пользователя, новые первыми."""
+
+    def get(self, request, *args, **kwargs):
+        jobs = self.get_queryset().order_by('-pk')[:settings.NOTES_PAGE_SIZE]
+        return JsonResponse({'results': [job_to_dict(job) for job in jobs]})
+
+
+class NoteJobApi(JobApiBase):
+    """Статус одной задачи."""
+
+    def get(self, request, pk, *args, **kwargs):
+        return JsonResponse(job_to_dict(self.get_job(pk)))
+
+
+class NoteJobDownload(JobApiBase):
+    """Файл, подготовленный задачей выгрузки."""
+
+    def get(self, request, pk, *args, **kwargs):
+        job = self.get_job(pk)
+        if job.status != NoteJob.DONE or not (job.result or {}).get('file'):
+            raise ApiError('Файл ещё не готов', status=404)
+        file_format = job.result['format']
+        try:
+            output = open(job_path(job.result['file']), 'rb')
+        except FileNotFoundError:
+            raise ApiError('Файл выгрузки удалён', status=404)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'notes.{EXTENSIONS[file_format]}',
+            content_type=CONTENT_TYPES[file_format],
+        )
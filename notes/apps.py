@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import checks, signals  # noqa: F401
+        from .warmup import warm_template_cache
+
+        if settings.TEMPLATE_WARMUP:
+            warm_template_cache()
@@ -0,0 +1,135 @@
+"""
+Асинхронные версии страниц чтения для запуска под ASGI.
+
+В Django 3.2 у ORM нет асинхронного API, поэтому вся работа
+с базой каждого запроса выполняется одним переходом sync_to_async,
+а остальное время запрос не занимает поток.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .cache import notes_list_cache
+from .models import Note
+from .pagination import CursorPaginator
+from .search import search_notes
+from .serializers import DETAIL_FIELDS, LIST_FIELDS, note_to_dict
+from .tags import sidebar_context
+
+
+def async_login_required(view):
+    """Аналог LoginRequiredMixin для асинхронных функций."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(get_user)(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _get_note(user, slug):
+    return get_object_or_404(
+        Note.objects.filter(author=user).for_detail(), slug=slug
+    )
+
+
+def _get_page(user, params):
+    paginator = CursorPaginator(
+        Note.objects.filter(author=user).for_list().organized(
+            tag=params.get('tag'), folder=params.get('folder')
+        ),
+        settings.NOTES_PAGE_SIZE,
+    )
+    try:
+        page = paginator.get_page(
+            after=params.get('after'), before=params.get('before')
+        )
+    except ValueError as error:
+        raise Http404(str(error))
+    return page
+
+
+def _search_page(user, params):
+    """Страница поиска по тем же правилам, что и у NoteSearch."""
+    size = settings.NOTES_PAGE_SIZE
+    try:
+        page = int(params.get('page', 1))
+    except ValueError:
+        raise Http404('Некорректный номер страницы')
+    if page < 1:
+        raise Http404('Некорректный номер страницы')
+    query = params.get('q', '')
+    results = search_notes(
+        user, query, limit=size + 1, offset=(page - 1) * size
+    )
+    return {
+        'query': query,
+        'results': results[:size],
+        'page': page,
+        'has_next': len(results) > size,
+    }
+
+
+def _render_list_fragment(request):
+    fragment = notes_list_cache.get(request.user.pk, request.GET)
+    if fragment is None:
+        page = _get_page(request.user, request.GET)
+        fragment = render_to_string(
+            'includes/notes_list.html',
+            {
+                'object_list': page.object_list,
+                'page_obj': page,
+                'is_paginated': page.has_other_pages(),
+                **sidebar_context(request.user, request.GET),
+            },
+            request,
+        )
+        notes_list_cache.set(request.user.pk, request.GET, fragment)
+    return fragment
+
+
+@async_login_required
+async def note_detail(request, slug):
+    note = await sync_to_async(_get_note)(request.user, slug)
+    return render(
+        request, 'notes/detail.html', {'note': note, 'object': note}
+    )
+
+
+@async_login_required
+async def notes_list(request):
+    fragment = await sync_to_async(_render_list_fragment)(request)
+    return render(
+        request, 'notes/list.html', {'notes_list': mark_safe(fragment)}
+    )
+
+
+@async_login_required
+async def note_search(request):
+    context = await sync_to_async(_search_page)(request.user, request.GET)
+    return render(request, 'notes/search.html', context)
+
+
+@async_login_required
+async def api_notes_list(request):
+    page = await sync_to_async(_get_page)(request.user, request.GET)
+    return JsonResponse({
+        'results': [note_to_dict(note, LIST_FIELDS) for note in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@async_login_required
+async def api_note_detail(request, slug):
+    note = await sync_to_async(_get_note)(request.user, slug)
+    return JsonResponse(note_to_dict(note, DETAIL_FIELDS))
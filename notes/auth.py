@@ -0,0 +1,71 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+
+class UserCache:
+    """
+    Кэш пользователей в памяти процесса.
+
+    Сигналы сбрасывают запись при любом сохранении пользователя,
+    в том числе при смене пароля; остальные процессы увидят
+    изменение не позже чем через timeout секунд.
+    """
+
+    def __init__(self, timeout, max_size):
+        self.timeout = timeout
+        self.max_size = max_size
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+        if entry is None:
+            return None
+        user, expires = entry
+        if expires < time.monotonic():
+            self.invalidate(user_id)
+            return None
+        # Копия: запрос может менять свой request.user.
+        return copy.copy(user)
+
+    def set(self, user, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        with self._lock:
+            if len(self._users) >= self.max_size:
+                self._users.pop(next(iter(self._users)))
+            self._users[user.pk] = (
+                copy.copy(user), time.monotonic() + timeout
+            )
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(
+    settings.AUTH_USER_CACHE_TIMEOUT, settings.AUTH_USER_CACHE_SIZE
+)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который не читает пользователя на каждом запросе."""
+
+    def get_user(self, user_id):
+        if not settings.AUTH_USER_CACHE_TIMEOUT:
+            return super().get_user(user_id)
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache.set(user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
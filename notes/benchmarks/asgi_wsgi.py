@@ -0,0 +1,110 @@
+"""
+Нагрузочный тест: синхронные страницы под WSGI и асинхронные под ASGI.
+
+Запросы идут прямо в обработчики Django (WSGIHandler и ASGIHandler)
+с заданной конкурентностью, без сетевого сервера, поэтому
+сравнивается именно стоимость обработки запроса.
+
+Запуск: python -m notes.benchmarks.asgi_wsgi
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .base import percentile, report, setup_django, test_database
+
+SYNC_URLS = ('notes:list', 'notes:detail', 'notes:search')
+ASYNC_URLS = ('notes:async_list', 'notes:async_detail', 'notes:async_search')
+
+
+def _urls(names, slug):
+    from django.urls import reverse
+
+    list_name, detail_name, search_name = names
+    return (
+        reverse(list_name),
+        reverse(detail_name, args=(slug,)),
+        reverse(search_name) + '?q=заметка',
+    )
+
+
+def _report(deployment, latencies, elapsed, concurrency):
+    report(
+        'load.asgi_vs_wsgi',
+        deployment=deployment,
+        concurrency=concurrency,
+        requests=len(latencies),
+        requests_per_sec=round(len(latencies) / elapsed, 1),
+        p50_ms=round(percentile(latencies, 0.5) * 1000, 2),
+        p99_ms=round(percentile(latencies, 0.99) * 1000, 2),
+    )
+
+
+def run_wsgi(author, slug, concurrency, requests):
+    from django.test import Client
+
+    urls = _urls(SYNC_URLS, slug)
+
+    def worker(client, count):
+        latencies = []
+        for index in range(count):
+            started = time.perf_counter()
+            client.get(urls[index % len(urls)])
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    # Сессии создаются заранее: SQLite в памяти плохо переносит
+    # параллельную запись из потоков.
+    clients = [Client() for _ in range(concurrency)]
+    for client in clients:
+        client.force_login(author)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        chunks = executor.map(
+            worker, clients, [requests // concurrency] * concurrency
+        )
+        latencies = [latency for chunk in chunks for latency in chunk]
+    _report('wsgi', latencies, time.perf_counter() - started, concurrency)
+
+
+def run_asgi(author, slug, concurrency, requests):
+    from asgiref.sync import sync_to_async
+    from django.test import AsyncClient
+
+    urls = _urls(ASYNC_URLS, slug)
+
+    async def worker(client, count):
+        latencies = []
+        for index in range(count):
+            started = time.perf_counter()
+            await client.get(urls[index % len(urls)])
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    async def main():
+        clients = [AsyncClient() for _ in range(concurrency)]
+        for client in clients:
+            await sync_to_async(client.force_login)(author)
+        chunks = await asyncio.gather(*(
+            worker(client, requests // concurrency) for client in clients
+        ))
+        return [latency for chunk in chunks for latency in chunk]
+
+    started = time.perf_counter()
+    latencies = asyncio.run(main())
+    _report('asgi', latencies, time.perf_counter() - started, concurrency)
+
+
+def run(concurrency=8, requests=800, notes=1000):
+    with test_database():
+        from .factories import seed
+
+        author, = seed(users=1, notes_per_user=notes)
+        slug = author.note_set.values_list('slug', flat=True).first()
+        run_wsgi(author, slug, concurrency, requests)
+        run_asgi(author, slug, concurrency, requests)
+
+
+if __name__ == '__main__':
+    setup_django()
+    run()
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    """Настраивает Django для запуска бенчмарка как скрипта."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    import django
+    django.setup()
+
+
+def timed(func, *args, **kwargs):
+    """Вызывает функцию и возвращает результат и время в секундах."""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def report(benchmark, stream=sys.stdout, **results):
+    """Печатает результат одной строкой JSON."""
+    line = json.dumps(
+        {'benchmark': benchmark, **results}, ensure_ascii=False
+    )
+    stream.write(line + '\n')
+
+
+@contextmanager
+def test_database():
+    """Временная тестовая база со всеми миграциями."""
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(values, quantile):
+    """Перцентиль по отсортированной выборке, без интерполяции."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(int(quantile * len(ordered)), len(ordered) - 1)
+    return ordered[index]
@@ -0,0 +1,86 @@
+"""
+Размер базы и время чтения/записи заметок без сжатия, с zlib и lzma.
+
+Тексты похожи на вставленные логи: повторяющиеся строки
+с разными временами, уровнями и числами.
+
+Запуск: python -m notes.benchmarks.compression
+"""
+import random
+
+from .base import report, setup_django, test_database, timed
+
+LEVELS = ('DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING', 'ERROR')
+NOTES = 200
+
+
+def make_log(size, seed):
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    while length < size:
+        line = (
+            f'2026-10-18 12:{rng.randrange(60):02}:{rng.randrange(60):02},'
+            f'{rng.randrange(1000):03} {rng.choice(LEVELS)} '
+            f'[worker-{rng.randrange(8)}] GET /notes/{rng.randrange(10000)}/'
+            f' {rng.choice((200, 200, 304, 404))} {rng.randrange(1, 900)}ms'
+        )
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)[:size]
+
+
+def _database_size(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        size = pages * cursor.fetchone()[0]
+        cursor.execute('SELECT COALESCE(SUM(LENGTH(text)), 0) FROM notes_note')
+        return size, cursor.fetchone()[0]
+
+
+def _measure(author, algorithm, text_size):
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    from notes.models import Note
+
+    texts = [make_log(text_size, seed) for seed in range(NOTES)]
+    with override_settings(NOTES_TEXT_COMPRESSION=algorithm):
+        Note.objects.all().delete()
+        _, write = timed(lambda: [
+            Note.objects.create(
+                title=f'Лог {index}', text=text,
+                slug=f'log-{index}', author=author,
+            )
+            for index, text in enumerate(texts)
+        ])
+        pks = list(Note.objects.values_list('pk', flat=True))
+        _, read = timed(lambda: [Note.objects.get(pk=pk).text for pk in pks])
+        database_bytes, text_bytes = _database_size(connection)
+    report(
+        'compression.notes',
+        algorithm=algorithm or 'none',
+        text_size=text_size,
+        text_bytes=text_bytes,
+        database_bytes=database_bytes,
+        write_ms=round(write / NOTES * 1000, 3),
+        read_ms=round(read / NOTES * 1000, 3),
+    )
+
+
+def run(text_sizes=(500, 20000, 200000)):
+    from .factories import make_author
+
+    author = make_author()
+    for text_size in text_sizes:
+        for algorithm in (None, 'zlib', 'lzma'):
+            _measure(author, algorithm, text_size)
+
+
+if __name__ == '__main__':
+    setup_django()
+    with test_database():
+        run()
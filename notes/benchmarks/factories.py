@@ -0,0 +1,52 @@
+"""Фабрики данных для замеров, по образцу фикстур conftest.py."""
+from django.contrib.auth import get_user_model
+from django.test.client import Client
+
+from notes.jobs import enqueue, run_next
+from notes.models import Note
+
+TEXT = 'Текст заметки для замеров. '
+
+
+def make_author(index=0):
+    return get_user_model().objects.create(username=f'Автор {index}')
+
+
+def make_author_client(author):
+    client = Client()
+    client.force_login(author)
+    return client
+
+
+def make_text(size):
+    return (TEXT * (size // len(TEXT) + 1))[:size]
+
+
+def make_notes(author, count, text_size=500, batch_size=500):
+    text = make_text(text_size)
+    Note.objects.bulk_create(
+        (
+            Note(
+                title=f'Заголовок {index}',
+                text=text,
+                slug=f'note-{author.pk}-{index}',
+                author=author,
+            )
+            for index in range(count)
+        ),
+        batch_size=batch_size,
+    )
+
+
+def make_export_job(author):
+    """Выполненная задача выгрузки, как фикстура export_job."""
+    enqueue('export_notes', {'format': 'jsonl'}, author=author)
+    return run_next()
+
+
+def seed(users=1, notes_per_user=100, text_size=500):
+    """Создаёт пользователей с заметками; возвращает пользователей."""
+    authors = [make_author(index) for index in range(users)]
+    for author in authors:
+        make_notes(author, notes_per_user, text_size)
+    return authors
@@ -0,0 +1,72 @@
+"""
+Накладные расходы ограничителя частоты на один запрос.
+
+Простое представление вызывается напрямую с ограничителем
+и без него; кэш-бэкенд проверяется на LocMem и файловом кэше.
+
+Запуск: python -m notes.benchmarks.ratelimit
+"""
+import tempfile
+import time
+
+from .base import report, setup_django
+
+REQUESTS = 20000
+
+
+def _per_request_us(view, request):
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        view(request)
+    return round((time.perf_counter() - started) / REQUESTS * 1e6, 2)
+
+
+def run():
+    from django.contrib.auth.models import AnonymousUser
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+
+    from notes.ratelimit import rate_limit
+
+    def view(request):
+        return HttpResponse()
+
+    request = RequestFactory().post('/')
+    request.user = AnonymousUser()
+    report(
+        'ratelimit.overhead', backend='none',
+        request_us=_per_request_us(view, request),
+    )
+    limited = rate_limit('bench')(view)
+    with tempfile.TemporaryDirectory() as directory:
+        caches = {
+            'locmem': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'file': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': directory,
+            },
+        }
+        cases = (
+            ('local', 'locmem'), ('cache', 'locmem'), ('cache', 'file')
+        )
+        for backend, alias in cases:
+            with override_settings(
+                CACHES=caches,
+                RATE_LIMITS={'bench': f'{REQUESTS * 10}/s'},
+                RATE_LIMIT_BACKEND=backend,
+                RATE_LIMIT_CACHE_ALIAS=alias,
+            ):
+                report(
+                    'ratelimit.overhead', backend=backend,
+                    cache=alias if backend == 'cache' else None,
+                    request_us=_per_request_us(limited, request),
+                )
+
+
+if __name__ == '__main__':
+    setup_django()
+    run()
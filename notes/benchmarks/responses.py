@@ -0,0 +1,92 @@
+"""
+Объём ответа и время сжатия/минификации для страниц заметок.
+
+Страницы берутся без сжатия и минификации, затем к их телу
+применяются те же функции, что и в middleware.
+
+Запуск: python -m notes.benchmarks.responses
+"""
+import time
+
+from .base import report, setup_django, test_database
+
+ITERATIONS = 50
+PAGES = (
+    ('home', '/'),
+    ('list', '/notes/'),
+    ('detail', '/note/big/'),
+    ('search', '/search/?q=Заголовок'),
+    ('export', '/export/?format=jsonl'),
+)
+
+
+def _cpu_ms(func, *args):
+    started = time.process_time()
+    for _ in range(ITERATIONS):
+        result = func(*args)
+    return result, round(
+        (time.process_time() - started) / ITERATIONS * 1000, 3
+    )
+
+
+def _encodings():
+    from yanote.compression import brotli
+
+    return ('gzip', 'br') if brotli is not None else ('gzip',)
+
+
+def _fetch_pages(notes, text_size):
+    from django.test.utils import override_settings
+
+    from notes.models import Note
+
+    from .factories import make_author, make_author_client, make_notes
+
+    author = make_author()
+    make_notes(author, notes, text_size)
+    Note.objects.create(
+        title='Большая заметка', text='Строка журнала.\n' * 2000,
+        slug='big', author=author,
+    )
+    with override_settings(RESPONSE_COMPRESSION=False, HTML_MINIFY=False):
+        client = make_author_client(author)
+        for page, url in PAGES:
+            response = client.get(url)
+            if response.streaming:
+                content = b''.join(response.streaming_content)
+            else:
+                content = response.content
+            yield page, response['Content-Type'], content
+
+
+def run(notes=200, text_size=500):
+    from yanote.compression import compress_content, minify_html
+
+    for page, content_type, content in _fetch_pages(notes, text_size):
+        variants = [('raw', content, 0)]
+        if content_type.startswith('text/html'):
+            minified, minify_ms = _cpu_ms(
+                lambda html: minify_html(html.decode()).encode(), content
+            )
+            variants.append(('minified', minified, minify_ms))
+        for variant, body, minify_ms in variants:
+            report(
+                'responses.page', page=page, body=variant,
+                encoding='identity', wire_bytes=len(body),
+                minify_ms=minify_ms, compress_ms=0,
+            )
+            for encoding in _encodings():
+                compressed, compress_ms = _cpu_ms(
+                    compress_content, body, encoding
+                )
+                report(
+                    'responses.page', page=page, body=variant,
+                    encoding=encoding, wire_bytes=len(compressed),
+                    minify_ms=minify_ms, compress_ms=compress_ms,
+                )
+
+
+if __name__ == '__main__':
+    setup_django()
+    with test_database():
+        run()
@@ -0,0 +1,67 @@
+"""
+Запросы к базе на одну страницу при разных хранилищах сессий
+и с кэшем пользователя в памяти процесса и без него.
+
+Запуск: python -m notes.benchmarks.sessions
+"""
+from .base import report, setup_django, test_database
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+REQUESTS = 50
+
+
+def _measure(index, strategy, user_cache_timeout, url):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext, override_settings
+
+    from notes.auth import user_cache
+
+    from .base import timed
+    from .factories import make_author, make_author_client
+
+    with override_settings(
+        SESSION_ENGINE=ENGINES[strategy],
+        AUTH_USER_CACHE_TIMEOUT=user_cache_timeout,
+        AUTHENTICATION_BACKENDS=[
+            'notes.auth.CachedModelBackend',
+            'django.contrib.auth.backends.ModelBackend',
+        ],
+    ):
+        user_cache.clear()
+        client = make_author_client(make_author(index))
+        # Первый запрос наполняет кэши.
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            _, elapsed = timed(
+                lambda: [client.get(url) for _ in range(REQUESTS)]
+            )
+            queries = len(context.captured_queries)
+    report(
+        'sessions.page',
+        url=url,
+        session=strategy,
+        user_cache=bool(user_cache_timeout),
+        queries_per_request=queries / REQUESTS,
+        request_ms=round(elapsed / REQUESTS * 1000, 3),
+    )
+
+
+def run(urls=('/', '/notes/')):
+    cases = [
+        (strategy, timeout, url)
+        for url in urls
+        for strategy in ENGINES
+        for timeout in (0, 60)
+    ]
+    for index, case in enumerate(cases):
+        _measure(index, *case)
+
+
+if __name__ == '__main__':
+    setup_django()
+    with test_database():
+        run()
@@ -0,0 +1,126 @@
+"""
+Конкурентная запись в SQLite: профиль по умолчанию против production.
+
+Несколько процессов, как воркеры gunicorn, вставляют заметки
+по одной в транзакции, пока другие процессы читают список.
+
+Запуск: python -m notes.benchmarks.sqlite_writes
+"""
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from .base import report, setup_django
+
+SCHEMA = """
+    CREATE TABLE note (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        author_id INTEGER NOT NULL,
+        title VARCHAR(100) NOT NULL,
+        text TEXT NOT NULL
+    );
+    CREATE INDEX note_author_id ON note (author_id, id DESC);
+"""
+
+
+def _connect(path, pragmas, timeout):
+    connection = sqlite3.connect(path, timeout=timeout)
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+
+def _writer(path, pragmas, timeout, worker, count, results):
+    connection = _connect(path, pragmas, timeout)
+    errors = 0
+    started = time.perf_counter()
+    for index in range(count):
+        try:
+            with connection:
+                connection.execute(
+                    'INSERT INTO note (author_id, title, text) '
+                    'VALUES (?, ?, ?)',
+                    (worker, f'Заметка {index}', 'Текст заметки ' * 20),
+                )
+        except sqlite3.OperationalError:
+            errors += 1
+    results.put(('write', count - errors, errors,
+                 time.perf_counter() - started))
+
+
+def _reader(path, pragmas, timeout, worker, count, results):
+    connection = _connect(path, pragmas, timeout)
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(count):
+        try:
+            connection.execute(
+                'SELECT id, title FROM note WHERE author_id = ? '
+                'ORDER BY id DESC LIMIT 20', (worker,)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            errors += 1
+    results.put(('read', count - errors, errors,
+                 time.perf_counter() - started))
+
+
+def run_profile(name, pragmas, timeout, writers=4, readers=4, count=300):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        connection = _connect(path, pragmas, timeout)
+        connection.executescript(SCHEMA)
+        connection.close()
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=_writer,
+                args=(path, pragmas, timeout, worker, count, results),
+            )
+            for worker in range(writers)
+        ] + [
+            multiprocessing.Process(
+                target=_reader,
+                args=(path, pragmas, timeout, worker, count * 10, results),
+            )
+            for worker in range(readers)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+    totals = {'write': [0, 0], 'read': [0, 0]}
+    for kind, done, errors, _ in outcomes:
+        totals[kind][0] += done
+        totals[kind][1] += errors
+    report(
+        'sqlite.concurrent_writes',
+        profile=name,
+        writers=writers,
+        readers=readers,
+        writes_per_sec=round(totals['write'][0] / elapsed),
+        reads_per_sec=round(totals['read'][0] / elapsed),
+        write_errors=totals['write'][1],
+        read_errors=totals['read'][1],
+        seconds=round(elapsed, 3),
+    )
+
+
+def run():
+    from django.conf import settings
+
+    run_profile('development', {}, timeout=5)
+    run_profile(
+        'production',
+        settings.SQLITE_PRODUCTION_PRAGMAS,
+        timeout=settings.SQLITE_BUSY_TIMEOUT,
+    )
+
+
+if __name__ == '__main__':
+    setup_django()
+    run()
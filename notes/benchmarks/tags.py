@@ -0,0 +1,84 @@
+"""
+Боковая панель тегов: чтение готовых счётчиков Tag.note_count
+против подсчёта GROUP BY по промежуточной таблице на каждый запрос.
+
+Запуск: python -m notes.benchmarks.tags
+"""
+import random
+
+from .base import report, setup_django, test_database, timed
+
+SIZES = (1000, 10000, 50000)
+TAGS = 50
+TAGS_PER_NOTE = 3
+REPEATS = 200
+
+
+def _seed(index, size):
+    from notes.models import Note, Tag
+
+    from .factories import make_author, make_notes
+
+    author = make_author(index)
+    make_notes(author, size, text_size=100)
+    Tag.objects.bulk_create(
+        Tag(author=author, name=f'тег {number}') for number in range(TAGS)
+    )
+    tag_ids = [tag.pk for tag in Tag.objects.filter(author=author)]
+    through = Note.tags.through
+    rows = (
+        through(note_id=note_id, tag_id=tag_id)
+        for note_id in Note.objects.filter(
+            author=author
+        ).values_list('pk', flat=True)
+        for tag_id in random.sample(tag_ids, TAGS_PER_NOTE)
+    )
+    # Счётчики тегов заполняют триггеры.
+    through.objects.bulk_create(rows, batch_size=1000)
+    return author
+
+
+def _per_call_ms(func):
+    _, elapsed = timed(lambda: [func() for _ in range(REPEATS)])
+    return round(elapsed / REPEATS * 1000, 3)
+
+
+def run():
+    from django.db.models import Count
+
+    from notes.models import Note, Tag
+    from notes.tags import set_note_tags
+
+    for index, size in enumerate(SIZES):
+        author = _seed(index, size)
+        denormalized = _per_call_ms(lambda: list(
+            Tag.objects.filter(
+                author=author, note_count__gt=0
+            ).order_by('name').values_list('name', 'note_count')
+        ))
+        aggregated = _per_call_ms(lambda: list(
+            Tag.objects.filter(author=author).annotate(
+                total=Count('notes')
+            ).filter(total__gt=0).order_by('name').values_list(
+                'name', 'total'
+            )
+        ))
+        note = Note.objects.filter(author=author).first()
+        names = list(
+            Tag.objects.filter(author=author).values_list('name', flat=True)
+        )
+        # Цена записи: смена тегов заметки с пересчётом счётчиков.
+        retag = _per_call_ms(
+            lambda: set_note_tags(note, random.sample(names, TAGS_PER_NOTE))
+        )
+        report(
+            'tags.sidebar', notes=size, tags=TAGS,
+            counters_ms=denormalized, group_by_ms=aggregated,
+            retag_note_ms=retag,
+        )
+
+
+if __name__ == '__main__':
+    setup_django()
+    with test_database():
+        run()
@@ -0,0 +1,71 @@
+"""
+Рендеринг notes/list.html с кэширующим загрузчиком и без него.
+
+Запуск: python -m notes.benchmarks.templates
+"""
+import time
+
+from .base import report, setup_django
+
+ITERATIONS = 20
+
+
+def _engine(cached):
+    from django.conf import settings
+    from django.template import Engine
+    from django.template.backends.django import get_installed_libraries
+
+    loaders = settings.TEMPLATE_LOADERS
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    return Engine(
+        dirs=[str(settings.BASE_DIR / 'templates')],
+        loaders=loaders,
+        # Те же библиотеки тегов, что у движка проекта ({% load cache %}).
+        libraries=get_installed_libraries(),
+    )
+
+
+def _render(engine, notes):
+    from django.template import Context
+    from django.utils.safestring import mark_safe
+
+    fragment = engine.get_template('includes/notes_list.html').render(
+        Context({'object_list': notes, 'is_paginated': False})
+    )
+    return engine.get_template('notes/list.html').render(
+        Context({'notes_list': mark_safe(fragment)})
+    )
+
+
+def run(sizes=(20, 1000, 10000)):
+    """
+    20 заметок — одна страница списка: там заметна экономия на разборе
+    шаблонов; на 1k/10k время занимает уже сам цикл по заметкам.
+    """
+    from notes.models import Note
+
+    for size in sizes:
+        notes = [
+            Note(id=index, title=f'Заметка {index}', slug=f'note-{index}')
+            for index in range(size)
+        ]
+        for cached in (False, True):
+            engine = _engine(cached)
+            # Первый рендер прогревает кэш загрузчика.
+            _render(engine, notes)
+            started = time.perf_counter()
+            for _ in range(ITERATIONS):
+                _render(engine, notes)
+            elapsed = (time.perf_counter() - started) / ITERATIONS
+            report(
+                'templates.notes_list',
+                notes=size,
+                loader='cached' if cached else 'filesystem',
+                render_ms=round(elapsed * 1000, 3),
+            )
+
+
+if __name__ == '__main__':
+    setup_django()
+    run()
@@ -0,0 +1,56 @@
+"""
+Сравнение slugify из pytils с кэширующей обёрткой notes.translit.
+
+Запуск: python -m notes.benchmarks.translit
+"""
+import random
+
+from .base import report, setup_django, timed
+
+WORDS = (
+    'заметка', 'список', 'покупок', 'встреча', 'проект', 'отчёт', 'идеи',
+    'книги', 'прочитать', 'рецепт', 'борща', 'поездка', 'в', 'Москву',
+    'план', 'на', 'неделю', 'задачи', 'работа', 'дом', 'ремонт', 'кухни',
+    'день', 'рождения', 'мамы', 'подарки', 'друзьям', 'учёба', 'курс',
+    'Python', 'Django', 'спринт', 'ретроспектива', 'итоги', 'года',
+    'отпуск', 'билеты', 'врач', 'запись', 'расходы', 'бюджет', 'черновик',
+)
+
+
+def make_corpus(size=20000, unique=2000, seed=42):
+    """Заголовки с повторами, как при импорте и повторной отправке форм."""
+    rng = random.Random(seed)
+    titles = [
+        ' '.join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize()
+        for _ in range(unique)
+    ]
+    # Популярные заголовки встречаются чаще остальных.
+    weights = [1 / rank for rank in range(1, unique + 1)]
+    return rng.choices(titles, weights=weights, k=size)
+
+
+def run(size=20000, unique=2000):
+    from pytils.translit import slugify as pytils_slugify
+
+    from notes import translit
+
+    corpus = make_corpus(size, unique)
+    translit.slugify.cache_clear()
+    _, uncached = timed(lambda: [pytils_slugify(title) for title in corpus])
+    _, cached = timed(lambda: [translit.slugify(title) for title in corpus])
+    stats = translit.cache_stats()
+    report(
+        'translit.slugify',
+        titles=size,
+        unique_titles=unique,
+        uncached_per_sec=round(size / uncached),
+        cached_per_sec=round(size / cached),
+        speedup=round(uncached / cached, 2),
+        hit_rate=round(stats['hit_rate'], 3),
+        cache_size=stats['size'],
+    )
+
+
+if __name__ == '__main__':
+    setup_django()
+    run()
@@ -0,0 +1,84 @@
+"""
+Замеры всех адресов notes.urls и yanote.urls.
+
+Для каждого адреса: пропускная способность, задержки,
+число SQL-запросов, размер ответа и пик памяти на запрос.
+"""
+import time
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from notes.query_budget import iter_url_names
+
+from .base import percentile
+from .factories import make_author_client, make_export_job
+
+
+def _consume(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure_url(author, name, url, requests):
+    """Замер одного адреса свежим клиентом автора."""
+    client = make_author_client(author)
+    response = client.get(url)
+    _consume(response)
+    status = response.status_code
+    with CaptureQueriesContext(connection) as queries:
+        size = _consume(client.get(url))
+    # captured_queries читает общий журнал: считаем сразу.
+    query_count = len(queries)
+    tracemalloc.start()
+    _consume(client.get(url))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        _consume(client.get(url))
+        latencies.append(time.perf_counter() - started)
+    total = sum(latencies)
+    return {
+        'url_name': name,
+        'url': url,
+        'status': status,
+        'requests': requests,
+        'requests_per_sec': round(requests / total, 1) if total else None,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'queries': query_count,
+        'response_bytes': size,
+        'peak_memory_bytes': peak,
+    }
+
+
+def measure_all(author, slug, requests):
+    """
+    Замеры всех адресов; адрес выхода — последним.
+
+    Адресам задач нужна выполненная выгрузка: её файл лежит
+    во временном каталоге до конца замеров.
+    """
+    names = sorted(
+        iter_url_names(), key=lambda item: item[0] == 'users:logout'
+    )
+    with TemporaryDirectory() as job_dir, override_settings(
+        NOTES_JOB_DIR=Path(job_dir)
+    ):
+        job = make_export_job(author)
+        for name, converters in names:
+            kwargs = {'slug': slug} if 'slug' in converters else {}
+            if 'pk' in converters:
+                kwargs['pk'] = job.pk
+            url = reverse(name, kwargs=kwargs)
+            if name.endswith('search'):
+                url += '?q=заголовок'
+            yield measure_url(author, name, url, requests)
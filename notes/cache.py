@@ -0,0 +1,158 @@
+import hashlib
+import re
+import time
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import (
+    add_never_cache_headers, patch_cache_control, patch_vary_headers
+)
+
+from yanote.metrics import registry
+
+
+class NotesListCache:
+    """
+    Кэш отрендеренного списка заметок автора.
+
+    Ключ фрагмента содержит номер версии автора: чтобы сбросить
+    все страницы списка, достаточно увеличить версию.
+    """
+
+    def __init__(self, alias, timeout):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _version_key(self, author_id):
+        return f'notes:list:version:{author_id}'
+
+    def _fragment_key(self, author_id, params):
+        version = self.get_version(author_id)
+        after = params.get('after', '')
+        before = params.get('before', '')
+        # Имена тегов и папок произвольны, в ключ идёт их хэш.
+        filters = hashlib.md5('\x00'.join(
+            params.get(name, '') for name in ('tag', 'folder')
+        ).encode()).hexdigest()
+        return f'notes:list:{author_id}:{version}:{after}:{before}:{filters}'
+
+    def get_version(self, author_id):
+        """Текущая версия списка автора."""
+        key = self._version_key(author_id)
+        version = self.backend.get(key)
+        if version is None:
+            # Версия, вытесненная из кэша, не должна совпасть со старой.
+            self.backend.add(key, time.time_ns(), None)
+            version = self.backend.get(key)
+        return version
+
+    def invalidate(self, author_id):
+        """Делает устаревшими все закэшированные страницы автора."""
+        key = self._version_key(author_id)
+        try:
+            self.backend.incr(key)
+        except ValueError:
+            self.backend.set(key, time.time_ns(), None)
+
+    def get(self, author_id, params):
+        fragment = self.backend.get(self._fragment_key(author_id, params))
+        if fragment is None:
+            registry.list_cache_misses.inc()
+        else:
+            registry.list_cache_hits.inc()
+        return fragment
+
+    def set(self, author_id, params, fragment):
+        self.backend.set(
+            self._fragment_key(author_id, params), fragment, self.timeout
+        )
+
+    def stats(self):
+        """
+        Счётчики попаданий и промахов в этом процессе.
+
+        Те же счётчики отдаются в /metrics/.
+        """
+        hits = registry.list_cache_hits.value
+        misses = registry.list_cache_misses.value
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+
+notes_list_cache = NotesListCache(
+    settings.NOTES_LIST_CACHE_ALIAS, settings.NOTES_LIST_CACHE_TIMEOUT
+)
+
+
+CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_MARKER = '\x00csrf\x00'
+
+
+def cache_anonymous_page(timeout=None, shared=False):
+    """
+    Кэширует страницу целиком для анонимных посетителей.
+
+    CSRF-токен в формах заменяется при каждой выдаче, поэтому
+    одна копия страницы подходит всем. Страницы без форм можно
+    отдавать общим кэшам (shared=True), страницы с формами
+    браузер не сохраняет. Кэшируются только адреса без параметров:
+    иначе любой посетитель мог бы вытеснить из кэша списки заметок
+    случайными ?x=....
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method != 'GET'
+                or request.user.is_authenticated
+                or request.GET
+            ):
+                response = view(request, *args, **kwargs)
+                patch_vary_headers(response, ('Cookie',))
+                return response
+            key = f'notes:page:{request.path}'
+            cache = caches[settings.NOTES_LIST_CACHE_ALIAS]
+            html = cache.get(key)
+            if html is None:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+                if response.status_code != HTTPStatus.OK:
+                    return response
+                html = CSRF_INPUT.sub(
+                    rf'\g<1>{CSRF_MARKER}\g<2>', response.content.decode()
+                )
+                cache.set(
+                    key, html,
+                    timeout or settings.NOTES_PAGE_CACHE_TIMEOUT,
+                )
+            # Ответ собирается одинаково при попадании и промахе.
+            has_form = CSRF_MARKER in html
+            if has_form:
+                html = html.replace(CSRF_MARKER, get_token(request))
+            response = HttpResponse(html)
+            patch_vary_headers(response, ('Cookie',))
+            if has_form:
+                add_never_cache_headers(response)
+            else:
+                patch_cache_control(
+                    response,
+                    public=shared,
+                    private=not shared,
+                    max_age=timeout or settings.NOTES_PAGE_CACHE_TIMEOUT,
+                )
+            return response
+        return wrapper
+    return decorator
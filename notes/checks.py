@@ -0,0 +1,22 @@
+from django.core.checks import Error, register
+from django.db import connections
+
+
+@register()
+def check_sqlite(app_configs, **kwargs):
+    """
+    Счётчики тегов и номера изменений для синхронизации ведут
+    триггеры SQLite, а порядок номеров держится на блокировке записи
+    SQLite. На другой базе боковая панель была бы пустой,
+    а синхронизация не видела бы изменений.
+    """
+    return [
+        Error(
+            f'База {alias} ({connections[alias].vendor}) не поддерживается: '
+            'notes использует триггеры SQLite.',
+            hint='Укажите django.db.backends.sqlite3 в DATABASES.',
+            id='notes.E001',
+        )
+        for alias in connections
+        if connections[alias].vendor != 'sqlite'
+    ]
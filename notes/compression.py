@@ -0,0 +1,76 @@
+import lzma
+import zlib
+
+from django.conf import settings
+
+# Первый байт значения указывает, как сохранён текст.
+RAW = b'\x00'
+ZLIB = b'\x01'
+LZMA = b'\x02'
+
+COMPRESSORS = {
+    'zlib': (ZLIB, zlib.compress),
+    'lzma': (LZMA, lzma.compress),
+}
+DECOMPRESSORS = {
+    ZLIB: zlib.decompress,
+    LZMA: lzma.decompress,
+}
+
+
+def compress_text(text, algorithm=None, threshold=None):
+    """
+    Кодирует текст для хранения в базе.
+
+    Текст короче порога (в байтах UTF-8) и текст, который
+    не стал меньше после сжатия, хранится как есть.
+    """
+    if algorithm is None:
+        algorithm = settings.NOTES_TEXT_COMPRESSION
+    if threshold is None:
+        threshold = settings.NOTES_TEXT_COMPRESSION_THRESHOLD
+    raw = text.encode()
+    if algorithm and len(raw) >= threshold:
+        marker, compress = COMPRESSORS[algorithm]
+        compressed = compress(raw)
+        if len(compressed) < len(raw):
+            return marker + compressed
+    return RAW + raw
+
+
+def decompress_text(value):
+    """Восстанавливает текст из значения, прочитанного из базы."""
+    if value is None or isinstance(value, str):
+        # Строки, записанные до появления сжатия.
+        return value
+    value = bytes(value)
+    marker, payload = value[:1], value[1:]
+    if marker == RAW:
+        return payload.decode()
+    return DECOMPRESSORS[marker](payload).decode()
+
+
+def register_sqlite_functions(connection):
+    """
+    Функция note_text() распаковывает текст прямо в SQL:
+    через неё полнотекстовый индекс читает заметки.
+    """
+    connection.create_function(
+        'note_text', 1, decompress_text, deterministic=True
+    )
+
+
+def recompress_notes(queryset, batch_size=500):
+    """
+    Перезаписывает тексты заметок по текущим настройкам сжатия.
+
+    Время изменения заметок не меняется.
+    """
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        notes = list(
+            queryset.filter(pk__in=ids[start:start + batch_size])
+            .only('pk', 'text')
+        )
+        queryset.bulk_update(notes, ['text'])
+    return len(ids)
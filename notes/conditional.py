@@ -0,0 +1,48 @@
+import hashlib
+
+from .models import Note
+
+
+def _etag(*parts):
+    raw = ':'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _note_updated_at(request, slug):
+    """Время изменения заметки; запоминается на время запроса."""
+    if not hasattr(request, '_note_updated_at'):
+        request._note_updated_at = Note.objects.filter(
+            author=request.user, slug=slug
+        ).values_list('updated_at', flat=True).first()
+    return request._note_updated_at
+
+
+def _notes_list_state(request):
+    """Состояние списка автора; запоминается на время запроса."""
+    if not hasattr(request, '_notes_list_state'):
+        request._notes_list_state = Note.objects.filter(
+            author=request.user
+        ).list_state()
+    return request._notes_list_state
+
+
+def note_etag(request, slug):
+    updated_at = _note_updated_at(request, slug)
+    if updated_at is None:
+        return None
+    return _etag(request.user.pk, slug, updated_at.isoformat())
+
+
+def note_last_modified(request, slug):
+    return _note_updated_at(request, slug)
+
+
+def notes_list_etag(request):
+    state = _notes_list_state(request)
+    last_modified = state['last_modified']
+    return _etag(
+        request.user.pk,
+        state['count'],
+        last_modified.isoformat() if last_modified else '',
+        request.GET.urlencode(),
+    )
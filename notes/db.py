@@ -0,0 +1,29 @@
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError
+
+
+def is_locked_error(error):
+    return 'database is locked' in str(error)
+
+
+def retry_on_locked(func):
+    """
+    Повторяет запись, если SQLite занят другим процессом.
+
+    busy timeout уже ждёт внутри драйвера; повтор с нарастающей
+    паузой спасает запросы, которые не дождались блокировки.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = settings.SQLITE_LOCK_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as error:
+                if not is_locked_error(error) or attempt == retries:
+                    raise
+                time.sleep(settings.SQLITE_LOCK_BACKOFF * 2 ** attempt)
+    return wrapper
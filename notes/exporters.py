@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+import zipfile
+
+from django.conf import settings
+
+from .models import Note
+
+EXPORT_FIELDS = ('title', 'text', 'slug', 'created_at', 'updated_at')
+
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'md': 'application/zip',
+}
+EXTENSIONS = {'jsonl': 'jsonl', 'csv': 'csv', 'md': 'zip'}
+FORMATS = tuple(CONTENT_TYPES)
+
+
+def export_queryset(author):
+    """Заметки автора, читаемые с сервера порциями, без кэша queryset."""
+    return Note.objects.filter(author=author).order_by('id').only(
+        'id', *EXPORT_FIELDS
+    ).iterator(chunk_size=settings.NOTES_EXPORT_CHUNK_SIZE)
+
+
+def _as_dict(note):
+    return {
+        'title': note.title,
+        'text': note.text,
+        'slug': note.slug,
+        'created_at': note.created_at.isoformat(),
+        'updated_at': note.updated_at.isoformat(),
+    }
+
+
+def export_jsonl(notes):
+    for note in notes:
+        line = json.dumps(_as_dict(note), ensure_ascii=False)
+        yield (line + '\n').encode()
+
+
+def export_csv(notes):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for note in notes:
+        writer.writerow(_as_dict(note))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Несжимаемый поток для zipfile, отдающий записанное порциями."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_markdown_zip(notes):
+    """Zip-архив с файлом Markdown на каждую заметку, собираемый на лету."""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for note in notes:
+            content = f'# {note.title}\n\n{note.text}\n'
+            archive.writestr(f'{note.slug}.md', content)
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+EXPORTERS = {
+    'jsonl': export_jsonl,
+    'csv': export_csv,
+    'md': export_markdown_zip,
+}
+
+
+def export_notes(author, file_format):
+    """Генератор байтов выгрузки всех заметок автора."""
+    return EXPORTERS[file_format](export_queryset(author))
@@ -0,0 +1,25 @@
+from django.db import models
+
+from .compression import compress_text, decompress_text
+
+
+class CompressedTextField(models.TextField):
+    """
+    Текстовое поле, которое хранит длинные значения сжатыми.
+
+    В базе это двоичная колонка, в Python — обычная строка.
+    Фильтровать по содержимому такого поля нельзя.
+    """
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        return decompress_text(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return connection.Database.Binary(compress_text(value))
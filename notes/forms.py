@@ -1,9 +1,10 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import transaction
 
-from .models import Note
+from .models import Folder, Note, Tag
+from .slugs import allocate_slug
+from .tags import get_folder, parse_tag_names, set_note_tags
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
@@ -11,19 +12,95 @@ WARNING = ' - такой slug уже существует, придумайте
 class NoteForm(forms.ModelForm):
     """Форма для создания или обновления заметки."""
 
+    tags = forms.CharField(
+        label='Теги', required=False, help_text='Через запятую'
+    )
+    folder = forms.CharField(
+        label='Папка',
+        required=False,
+        max_length=Folder._meta.get_field('name').max_length,
+    )
+
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None and not self.is_bound:
+            self.initial['tags'] = ', '.join(
+                self.instance.tags.order_by('name').values_list(
+                    'name', flat=True
+                )
+            )
+            if self.instance.folder_id is not None:
+                self.initial['folder'] = self.instance.folder.name
+
+    def clean_tags(self):
+        names = parse_tag_names(self.cleaned_data.get('tags', ''))
+        max_length = Tag._meta.get_field('name').max_length
+        too_long = [name for name in names if len(name) > max_length]
+        if too_long:
+            raise ValidationError(
+                f'Тег длиннее {max_length} символов: {too_long[0]}'
+            )
+        return names
+
+    def save(self, commit=True):
+        """Заметка, папка и теги с их счётчиками сохраняются вместе."""
+        if not commit:
+            return super().save(commit=False)
+        with transaction.atomic():
+            note = self.instance
+            note.folder = get_folder(
+                note.author_id, self.cleaned_data.get('folder', '').strip()
+            )
+            note = super().save()
+            set_note_tags(note, self.cleaned_data.get('tags', []))
+        return note
+
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Пустой slug подбирается по заголовку со свободным суффиксом,
+        ошибку получает только явно указанный занятый slug.
+        """
         cleaned_data = super().clean()
         slug = cleaned_data.get('slug')
         if not slug:
             title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
+            self.instance.slug_is_generated = True
+            return allocate_slug(Note, title, exclude_pk=self.instance.pk)
         if Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+
+class NoteImportForm(NoteForm):
+    """
+    Проверка строки импорта по правилам NoteForm.
+
+    Уникальность slug проверяется сразу для всей пачки строк,
+    поэтому форма не обращается к базе.
+    """
+
+    def clean_slug(self):
+        return self.cleaned_data.get('slug')
+
+    def validate_unique(self):
+        pass
+
+
+class NoteUploadForm(forms.Form):
+    """Файл с заметками для импорта."""
+
+    file = forms.FileField(label='Файл')
+    format = forms.ChoiceField(
+        label='Формат',
+        choices=(('', 'По расширению файла'), ('jsonl', 'JSON Lines'),
+                 ('csv', 'CSV')),
+        required=False,
+    )
@@ -0,0 +1,191 @@
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .cache import notes_list_cache
+from .forms import NoteImportForm
+from .models import Note
+from .search import index_notes
+from .slugs import allocate_slugs
+
+FORMATS = ('jsonl', 'csv')
+
+
+def detect_format(filename):
+    """Определяет формат файла по расширению."""
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension in ('jsonl', 'ndjson', 'json'):
+        return 'jsonl'
+    if extension == 'csv':
+        return 'csv'
+    raise ValueError(f'Неизвестный формат файла: {filename}')
+
+
+def read_jsonl(stream):
+    """Построчно читает JSON Lines: (номер строки, данные, ошибка)."""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield line_number, None, f'Некорректный JSON: {error}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'Ожидается JSON-объект'
+            continue
+        yield line_number, row, None
+
+
+def read_csv(stream):
+    """Построчно читает CSV с заголовком: (номер строки, данные, ошибка)."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row, None
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def read_safely(rows):
+    """
+    Превращает ошибку чтения файла в ошибку строки.
+
+    После неверной кодировки или испорченного CSV файл дальше
+    не читается; строки до ошибки импортируются как обычно.
+    """
+    line_number = 0
+    try:
+        for line_number, row, error in rows:
+            yield line_number, row, error
+    except UnicodeDecodeError:
+        yield line_number + 1, None, 'Файл должен быть в кодировке UTF-8'
+    except csv.Error as error:
+        yield line_number + 1, None, f'Некорректный CSV: {error}'
+
+
+class ImportResult:
+    """Итог импорта: число созданных заметок и ошибки по строкам."""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line_number, message):
+        self.errors.append((line_number, message))
+
+
+class NoteImporter:
+    """
+    Потоковый импорт заметок пачками.
+
+    Каждая пачка проверяется формой, получает slug одним запросом
+    и сохраняется через bulk_create в отдельной транзакции,
+    так что ошибка в одной строке не отменяет остальные.
+    """
+
+    def __init__(self, author, chunk_size=None):
+        self.author = author
+        self.chunk_size = chunk_size or settings.NOTES_IMPORT_CHUNK_SIZE
+        self.result = ImportResult()
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk(chunk)
+        self.result.errors.sort()
+        if self.result.created:
+            # bulk_create не отправляет post_save.
+            notes_list_cache.invalidate(self.author.pk)
+        return self.result
+
+    def import_file(self, stream, file_format):
+        return self.run(read_safely(READERS[file_format](stream)))
+
+    def _validate(self, chunk):
+        valid = []
+        for line_number, row, error in chunk:
+            if error:
+                self.result.add_error(line_number, error)
+                continue
+            form = NoteImportForm(data=row)
+            if not form.is_valid():
+                messages = (
+                    f'{field}: {" ".join(errors)}'
+                    for field, errors in form.errors.items()
+                )
+                self.result.add_error(line_number, '; '.join(messages))
+                continue
+            valid.append((line_number, form.cleaned_data))
+        return valid
+
+    def _check_explicit_slugs(self, valid):
+        explicit = {data['slug'] for _, data in valid if data['slug']}
+        taken = set(
+            Note.objects.filter(slug__in=explicit)
+            .values_list('slug', flat=True)
+        )
+        checked = []
+        for line_number, data in valid:
+            slug = data['slug']
+            if slug and slug in taken:
+                self.result.add_error(
+                    line_number, f'slug: {slug} уже существует'
+                )
+                continue
+            if slug:
+                taken.add(slug)
+            checked.append((line_number, data))
+        return checked, taken
+
+    def _import_chunk(self, chunk):
+        valid, reserved = self._check_explicit_slugs(self._validate(chunk))
+        generated = iter(allocate_slugs(
+            Note,
+            [data['title'] for _, data in valid if not data['slug']],
+            reserved=reserved,
+        ))
+        notes = []
+        for line_number, data in valid:
+            note = Note(
+                title=data['title'],
+                text=data['text'],
+                slug=data['slug'] or next(generated),
+                author=self.author,
+            )
+            note.slug_is_generated = not data['slug']
+            notes.append((line_number, note))
+        try:
+            with transaction.atomic():
+                Note.objects.bulk_create(note for _, note in notes)
+                self._index(note for _, note in notes)
+        except IntegrityError:
+            # Кто-то параллельно занял slug: сохраняем по одной.
+            self._save_one_by_one(notes)
+        else:
+            self.result.created += len(notes)
+
+    def _index(self, notes):
+        """bulk_create не отправляет сигналы: индексируем пачку сами."""
+        notes = {note.slug: note for note in notes}
+        ids = Note.objects.filter(slug__in=notes).values_list('slug', 'pk')
+        index_notes(
+            (pk, notes[slug].title, notes[slug].text) for slug, pk in ids
+        )
+
+    def _save_one_by_one(self, notes):
+        for line_number, note in notes:
+            note.pk = None
+            try:
+                with transaction.atomic():
+                    note.save()
+            except IntegrityError as error:
+                self.result.add_error(line_number, str(error))
+            else:
+                self.result.created += 1
@@ -0,0 +1,204 @@
+"""
+Очередь фоновых задач в таблице NoteJob.
+
+Представления ставят задачу через enqueue(), процессы
+manage.py run_note_worker забирают её и выполняют. Упавшая
+задача возвращается в очередь с нарастающей паузой, пока
+не исчерпает max_attempts.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .compression import recompress_notes
+from .exporters import EXTENSIONS, export_notes
+from .importers import NoteImporter
+from .models import Note, NoteJob
+from .search import rebuild_search_index
+from .sync import purge_tombstones
+
+logger = logging.getLogger('yanote.jobs')
+
+TASKS = {}
+
+
+def task(kind):
+    """Регистрирует функцию, выполняющую задачи вида kind."""
+    def decorator(func):
+        TASKS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, author=None, max_attempts=None):
+    if kind not in TASKS:
+        raise ValueError(f'Неизвестная задача: {kind}')
+    return NoteJob.objects.create(
+        kind=kind,
+        payload=payload or {},
+        author=author,
+        max_attempts=max_attempts or settings.NOTES_JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim_next():
+    """
+    Забирает следующую задачу из очереди.
+
+    Задачу помечает выполняемой условный UPDATE: если её уже
+    забрал другой процесс, он не изменит ни одной строки.
+    """
+    now = timezone.now()
+    candidates = NoteJob.objects.filter(
+        status=NoteJob.QUEUED, run_after__lte=now
+    ).order_by('run_after', 'pk').values_list('pk', flat=True)
+    for pk in candidates[:settings.NOTES_WORKER_PROCESSES + 1]:
+        claimed = NoteJob.objects.filter(
+            pk=pk, status=NoteJob.QUEUED
+        ).update(
+            status=NoteJob.RUNNING, started_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return NoteJob.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    try:
+        result = TASKS[job.kind](job)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = NoteJob.QUEUED
+            job.run_after = timezone.now() + timedelta(
+                seconds=settings.NOTES_JOB_RETRY_DELAY
+                * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = NoteJob.FAILED
+            job.finished_at = timezone.now()
+        logger.exception('Задача %s завершилась ошибкой', job)
+    else:
+        job.status = NoteJob.DONE
+        job.result = result
+        job.error = ''
+        job.finished_at = timezone.now()
+    job.save(update_fields=(
+        'status', 'result', 'error', 'run_after', 'finished_at'
+    ))
+    return job
+
+
+def run_next():
+    """Выполняет одну задачу; None, если очередь пуста."""
+    job = claim_next()
+    if job is not None:
+        run_job(job)
+    return job
+
+
+def requeue_stale():
+    """
+    Возвращает в очередь задачи, чей воркер завис или упал.
+
+    Задача, которая выполняется дольше NOTES_JOB_TIMEOUT,
+    считается брошенной.
+    """
+    stale = NoteJob.objects.filter(
+        status=NoteJob.RUNNING,
+        started_at__lt=timezone.now() - timedelta(
+            seconds=settings.NOTES_JOB_TIMEOUT
+        ),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=NoteJob.FAILED, error='Превышено время выполнения',
+        finished_at=timezone.now(),
+    )
+    return failed + stale.update(status=NoteJob.QUEUED)
+
+
+def purge_finished():
+    """Удаляет завершённые задачи старше NOTES_JOB_KEEP вместе с файлами."""
+    old = NoteJob.objects.filter(
+        status__in=(NoteJob.DONE, NoteJob.FAILED),
+        finished_at__lt=timezone.now() - settings.NOTES_JOB_KEEP,
+    )
+    # Файл загрузки остаётся, если воркер погиб посреди импорта.
+    for payload, result in old.values_list('payload', 'result'):
+        for data in (payload, result):
+            if isinstance(data, dict) and data.get('file'):
+                job_path(data['file']).unlink(missing_ok=True)
+    return old.delete()[0]
+
+
+def maintain():
+    """Обслуживание очереди: зависшие задачи, старые задачи и следы."""
+    requeue_stale()
+    purge_finished()
+    purge_tombstones()
+
+
+def work(stop=None, poll_interval=1.0, until_empty=False):
+    """Цикл воркера; stop — событие для мягкой остановки."""
+    done = 0
+    while stop is None or not stop.is_set():
+        close_old_connections()
+        job = run_next()
+        if job is not None:
+            done += 1
+            continue
+        if until_empty:
+            break
+        time.sleep(poll_interval)
+    return done
+
+
+def job_path(name):
+    return settings.NOTES_JOB_DIR / name
+
+
+@task('import_notes')
+def import_notes_task(job):
+    path = job_path(job.payload['file'])
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            result = NoteImporter(job.author).import_file(
+                stream, job.payload['format']
+            )
+    finally:
+        # Импорт не повторяется, файл после сбоя тоже не нужен.
+        path.unlink(missing_ok=True)
+    return {'created': result.created, 'errors': result.errors}
+
+
+@task('export_notes')
+def export_notes_task(job):
+    file_format = job.payload['format']
+    name = f'export-{job.pk}.{EXTENSIONS[file_format]}'
+    settings.NOTES_JOB_DIR.mkdir(parents=True, exist_ok=True)
+    with open(job_path(name), 'wb') as output:
+        for chunk in export_notes(job.author, file_format):
+            output.write(chunk)
+    return {'file': name, 'format': file_format}
+
+
+@task('rebuild_search')
+def rebuild_search_task(job):
+    return {'rebuilt': rebuild_search_index()}
+
+
+@task('recompress_notes')
+def recompress_notes_task(job):
+    return {'notes': recompress_notes(Note.objects.all())}
+
+
+@task('purge_tombstones')
+def purge_tombstones_task(job):
+    return {'purged': purge_tombstones()}
@@ -0,0 +1,80 @@
+import json
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+from notes.benchmarks.base import report, test_database
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as results:
+        return {
+            row['url_name']: row
+            for row in map(json.loads, results) if 'url_name' in row
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет все адреса проекта на тестовой базе с заданным '
+        'объёмом данных и печатает результаты в JSON Lines.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--notes', type=int, default=1000)
+        parser.add_argument('--text-size', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--output', help='Файл для результатов.')
+        parser.add_argument(
+            '--compare', help='Результаты прошлого запуска для сравнения.'
+        )
+
+    def handle(self, *args, **options):
+        output = (
+            open(options['output'], 'w', encoding='utf-8')
+            if options['output'] else sys.stdout
+        )
+        previous = _load(options['compare']) if options['compare'] else {}
+        meta = {
+            'commit': _git_commit(),
+            'users': options['users'],
+            'notes_per_user': options['notes'],
+            'text_size': options['text_size'],
+        }
+        try:
+            with test_database():
+                from notes.benchmarks.factories import seed
+                from notes.benchmarks.urls import measure_all
+
+                author, *_ = seed(
+                    options['users'], options['notes'], options['text_size']
+                )
+                slug = author.note_set.values_list('slug', flat=True).first()
+                report('meta', stream=output, **meta)
+                for result in measure_all(author, slug, options['requests']):
+                    report('url', stream=output, **result)
+                    self._compare(previous.get(result['url_name']), result)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+    def _compare(self, before, after):
+        if before is None:
+            return
+        self.stderr.write(
+            f'{after["url_name"]}: p50 {before["p50_ms"]} -> '
+            f'{after["p50_ms"]} мс, запросов {before["queries"]} -> '
+            f'{after["queries"]}'
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from notes.compression import recompress_notes
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересжимает тексты заметок по настройкам '
+        'NOTES_TEXT_COMPRESSION и NOTES_TEXT_COMPRESSION_THRESHOLD.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = recompress_notes(Note.objects.all(), options['batch_size'])
+        self.stdout.write(f'Обработано заметок: {count}')
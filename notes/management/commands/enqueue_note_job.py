@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from notes.jobs import enqueue
+
+# Служебные задачи, которые не относятся к одному пользователю.
+KINDS = ('rebuild_search', 'recompress_notes', 'purge_tombstones')
+
+
+class Command(BaseCommand):
+    help = 'Ставит служебную задачу в очередь run_note_worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+
+    def handle(self, *args, **options):
+        job = enqueue(options['kind'])
+        self.stdout.write(f'Задача {job.pk} поставлена в очередь')
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.importers import FORMATS, NoteImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки пользователя из JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден'
+            )
+        path = options['path']
+        try:
+            file_format = options['format'] or detect_format(path)
+        except ValueError as error:
+            raise CommandError(error)
+        importer = NoteImporter(author, chunk_size=options['chunk_size'])
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            result = importer.import_file(stream, file_format)
+        for line_number, message in result.errors:
+            self.stderr.write(f'Строка {line_number}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано заметок: {result.created}, '
+            f'ошибок: {len(result.errors)}'
+        ))
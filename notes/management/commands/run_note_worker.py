@@ -0,0 +1,97 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from notes.jobs import maintain, work
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _worker(stop, poll_interval):
+    # Остановку ведёт главный процесс через событие stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    work(stop, poll_interval)
+
+
+def start_worker(stop, poll_interval):
+    process = multiprocessing.Process(
+        target=_worker, args=(stop, poll_interval)
+    )
+    process.start()
+    return process
+
+
+def restart_dead(processes, start):
+    """Заменяет упавшие процессы новыми; возвращает их число."""
+    dead = [
+        index for index, process in enumerate(processes)
+        if not process.is_alive()
+    ]
+    for index in dead:
+        processes[index].join()
+        processes[index] = start()
+    return len(dead)
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи заметок в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.NOTES_WORKER_PROCESSES
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить задачи, которые уже в очереди, и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        maintain()
+        if options['once']:
+            done = work(until_empty=True)
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        stop = multiprocessing.Event()
+
+        def start():
+            # Дочерние процессы открывают свои соединения с базой.
+            connections.close_all()
+            return start_worker(stop, options['poll_interval'])
+
+        processes = [start() for _ in range(options['processes'])]
+        signal.signal(signal.SIGTERM, _interrupt)
+        self.stdout.write(f'Запущено воркеров: {len(processes)}')
+        try:
+            self._supervise(processes, start)
+        except KeyboardInterrupt:
+            stop.set()
+        # Текущие задачи доделываются, новые не берутся.
+        for process in processes:
+            process.join()
+
+    def _supervise(self, processes, start):
+        """
+        Перезапускает упавшие воркеры и периодически обслуживает очередь.
+
+        Задача упавшего воркера остаётся RUNNING, пока её не вернёт
+        в очередь requeue_stale по NOTES_JOB_TIMEOUT.
+        """
+        interval = settings.NOTES_WORKER_MAINTENANCE_INTERVAL
+        next_maintenance = time.monotonic() + interval
+        while True:
+            time.sleep(1)
+            restarted = restart_dead(processes, start)
+            if restarted:
+                self.stderr.write(f'Перезапущено воркеров: {restarted}')
+            if time.monotonic() >= next_maintenance:
+                maintain()
+                connections.close_all()
+                next_maintenance = time.monotonic() + interval
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-18 05:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_alter_note_title'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', '-id'], name='note_author_id_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 3.2.15 on 2026-10-18 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Курсор синхронизации — номер изменения, который выдают триггеры
+# под блокировкой записи, а не время updated_at из Python.
+COUNTER = 'notes_sync_counter'
+NEXT = f'(SELECT value FROM {COUNTER})'
+
+TRIGGERS_SQL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_note_sync_insert
+    AFTER INSERT ON notes_note BEGIN
+        UPDATE {COUNTER} SET value = value + 1;
+        UPDATE notes_note SET change_seq = {NEXT}, created_seq = {NEXT}
+        WHERE id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_note_sync_update
+    AFTER UPDATE ON notes_note
+    WHEN old.created_seq <> 0
+    AND old.updated_at IS NOT new.updated_at BEGIN
+        UPDATE {COUNTER} SET value = value + 1;
+        UPDATE notes_note
+        SET change_seq = {NEXT}, created_seq = old.created_seq
+        WHERE id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_notetombstone_sync_insert
+    AFTER INSERT ON notes_notetombstone BEGIN
+        UPDATE {COUNTER} SET value = value + 1;
+        UPDATE notes_notetombstone SET change_seq = {NEXT}
+        WHERE id = new.id;
+    END
+    """,
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_sync_insert',
+    'DROP TRIGGER IF EXISTS notes_note_sync_update',
+    'DROP TRIGGER IF EXISTS notes_notetombstone_sync_insert',
+    f'DROP TABLE IF EXISTS {COUNTER}',
+)
+
+BATCH_SIZE = 500
+
+
+def number_notes(apps, schema_editor):
+    """Нумерует существующие заметки в порядке изменения."""
+    alias = schema_editor.connection.alias
+    Note = apps.get_model('notes', 'Note')
+    notes = list(
+        Note.objects.using(alias).only('id').order_by('updated_at', 'id')
+    )
+    for seq, note in enumerate(notes, 1):
+        note.change_seq = note.created_seq = seq
+    Note.objects.using(alias).bulk_update(
+        notes, ['change_seq', 'created_seq'], batch_size=BATCH_SIZE
+    )
+    schema_editor.execute(
+        f'CREATE TABLE {COUNTER} ('
+        'id INTEGER PRIMARY KEY CHECK (id = 1), '
+        'value INTEGER NOT NULL, purged INTEGER NOT NULL)'
+    )
+    schema_editor.execute(
+        f'INSERT INTO {COUNTER} (id, value, purged) VALUES (1, %s, 0)',
+        (len(notes),),
+    )
+    for sql in TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_counter(apps, schema_editor):
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0005_note_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_id', models.BigIntegerField()),
+                ('slug', models.SlugField(db_index=False, max_length=100)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+                ('change_seq', models.BigIntegerField(default=0, editable=False)),
+                ('author', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notetombstone',
+            index=models.Index(fields=['author', 'deleted_at'], name='tombstone_author_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notetombstone',
+            index=models.Index(fields=['author', 'change_seq'], name='tombstone_author_seq_idx'),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='created_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', 'change_seq'], name='note_author_seq_idx'),
+        ),
+        migrations.RunPython(number_notes, drop_counter),
+    ]
@@ -0,0 +1,114 @@
+# Тексты заметок хранятся сжатыми. Полнотекстовый индекс
+# переходит на представление, которое распаковывает текст
+# SQL-функцией note_text(); нужна она только при перестроении
+# индекса, поэтому триггеров с ней нет.
+
+from django.db import migrations
+
+import notes.fields
+from notes.compression import register_sqlite_functions
+
+FTS_TABLE = 'notes_note_fts'
+FTS_CONTENT = 'notes_note_fts_content'
+BATCH_SIZE = 500
+
+CREATE_SQL = (
+    f"""
+    CREATE VIEW {FTS_CONTENT} AS
+    SELECT id, title, note_text(text) AS text FROM notes_note
+    """,
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, text, content='{FTS_CONTENT}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    # Представление мешает следующим миграциям пересоздавать
+    # таблицу заметок; его вернёт обработчик post_migrate.
+    f'DROP VIEW {FTS_CONTENT}',
+)
+
+# Индекс в том виде, в каком его создаёт 0005_note_fts.
+CREATE_PLAIN_SQL = tuple(
+    sql.replace(f"'{FTS_CONTENT}'", "'notes_note'")
+    for sql in CREATE_SQL[1:-1]
+)
+
+DROP_SQL = (
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+    f'DROP VIEW IF EXISTS {FTS_CONTENT}',
+)
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        options = {row[0] for row in cursor.fetchall()}
+    return 'ENABLE_FTS5' in options
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+def create_fts(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    register_sqlite_functions(schema_editor.connection.connection)
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def create_plain_fts(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    for sql in CREATE_PLAIN_SQL:
+        schema_editor.execute(sql)
+
+
+def compress_texts(apps, schema_editor):
+    """Перезаписывает тексты: CompressedTextField сжимает их при записи."""
+    Note = apps.get_model('notes', 'Note')
+    notes = Note.objects.using(schema_editor.connection.alias)
+    ids = list(notes.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = list(
+            notes.filter(pk__in=ids[start:start + BATCH_SIZE])
+            .only('pk', 'text')
+        )
+        notes.bulk_update(batch, ['text'])
+
+
+def decompress_texts(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    notes = Note.objects.using(schema_editor.connection.alias)
+    for pk, text in notes.values_list('pk', 'text'):
+        schema_editor.execute(
+            'UPDATE notes_note SET text = %s WHERE id = %s', (text, pk)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_notetombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fts, create_plain_fts),
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(
+                help_text='Добавьте подробностей', verbose_name='Текст'
+            ),
+        ),
+        migrations.RunPython(compress_texts, decompress_texts),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -1,7 +1,87 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
-from pytils.translit import slugify
+from .fields import CompressedTextField
+from .slugs import save_with_generated_slug
+
+
+class NoteQuerySet(models.QuerySet):
+    """Проекции заметок под разные страницы."""
+
+    LIST_FIELDS = ('id', 'slug', 'title')
+    DETAIL_FIELDS = (
+        'id', 'slug', 'title', 'text', 'author', 'created_at', 'updated_at'
+    )
+
+    def for_list(self):
+        """Только поля, нужные списку: текст заметки не читается."""
+        return self.only(*self.LIST_FIELDS)
+
+    def for_detail(self):
+        """Поля для страниц отдельной заметки."""
+        return self.only(*self.DETAIL_FIELDS)
+
+    def organized(self, tag=None, folder=None):
+        """Заметки с тегом и в папке, если они заданы."""
+        queryset = self
+        if tag:
+            queryset = queryset.filter(tags__name=tag)
+        if folder:
+            queryset = queryset.filter(folder__name=folder)
+        return queryset
+
+    def list_state(self):
+        """Число заметок и время последнего изменения одним запросом."""
+        return self.aggregate(
+            count=models.Count('id'),
+            last_modified=models.Max('updated_at'),
+        )
+
+
+class Folder(models.Model):
+    """Папка, в которой лежат заметки пользователя."""
+
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+'
+    )
+    name = models.CharField('Название', max_length=100)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('author', 'name'), name='folder_author_name_uniq'
+            ),
+        )
+
+    def __str__(self):
+        return self.name
+
+
+class Tag(models.Model):
+    """
+    Тег пользователя.
+
+    note_count — число заметок с тегом; его ведут триггеры
+    (notes.tags.TAG_COUNT_TRIGGERS), чтобы список тегов
+    не требовал GROUP BY по всем заметкам.
+    """
+
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+'
+    )
+    name = models.CharField('Название', max_length=50)
+    note_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('author', 'name'), name='tag_author_name_uniq'
+            ),
+        )
+
+    def __str__(self):
+        return self.name
 
 
 class Note(models.Model):
@@ -11,7 +91,7 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -27,12 +107,162 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    folder = models.ForeignKey(
+        Folder,
+        verbose_name='Папка',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notes',
+    )
+    tags = models.ManyToManyField(
+        Tag, verbose_name='Теги', blank=True, related_name='notes'
+    )
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменена', auto_now=True)
+    # Номера изменений для синхронизации; их выдают триггеры,
+    # см. notes.sync.SYNC_TRIGGERS.
+    change_seq = models.BigIntegerField(default=0, editable=False)
+    created_seq = models.BigIntegerField(default=0, editable=False)
+
+    objects = NoteQuerySet.as_manager()
+
+    # Slug подобран автоматически и может быть заменён при коллизии.
+    slug_is_generated = False
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', '-id'), name='note_author_id_desc_idx'
+            ),
+            models.Index(
+                fields=('author', 'updated_at'),
+                name='note_author_updated_idx',
+            ),
+            models.Index(
+                fields=('author', 'change_seq'),
+                name='note_author_seq_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        # Сигналы пишут прежнюю версию в историю правок в той же
+        # транзакции, что и саму заметку.
+        with transaction.atomic():
+            if not self.slug or self.slug_is_generated:
+                save_with_generated_slug(
+                    self, super().save, *args, **kwargs
+                )
+            else:
+                super().save(*args, **kwargs)
+
+
+class NoteRevision(models.Model):
+    """
+    Прежняя версия заметки.
+
+    Хранится разница со следующей версией, а каждая
+    NOTES_REVISION_SNAPSHOT_EVERY-я версия — целиком.
+    """
+
+    note = models.ForeignKey(
+        Note,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField()
+    title = models.CharField(max_length=100)
+    is_snapshot = models.BooleanField(default=False)
+    data = CompressedTextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'), name='note_revision_number_uniq'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id}#{self.number}'
+
+
+class NoteTombstone(models.Model):
+    """След удалённой заметки для синхронизации клиентов."""
+
+    # Без ограничения внешнего ключа: следы заметок удаляемого
+    # пользователя появляются во время каскадного удаления.
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+',
+    )
+    note_id = models.BigIntegerField()
+    slug = models.SlugField(max_length=100, db_index=False)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    change_seq = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'deleted_at'),
+                name='tombstone_author_deleted_idx',
+            ),
+            models.Index(
+                fields=('author', 'change_seq'),
+                name='tombstone_author_seq_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.slug
+
+
+class NoteJob(models.Model):
+    """Фоновая задача из очереди, которую выполняет run_note_worker."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField(max_length=50)
+    # Служебные задачи (переиндексация, пересжатие) без автора.
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+    )
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'), name='job_status_run_after_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.kind}#{self.pk}'
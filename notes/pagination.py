@@ -0,0 +1,104 @@
+import base64
+import binascii
+
+from django.http import Http404
+
+
+def encode_cursor(pk):
+    """Кодирует id заметки в непрозрачный курсор для URL."""
+    raw = str(pk).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Восстанавливает id заметки из курсора."""
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        return int(base64.urlsafe_b64decode(cursor + padding).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f'Некорректный курсор: {cursor}')
+
+
+class CursorPage:
+    """Страница заметок, полученная по курсору."""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            return encode_cursor(self.object_list[-1].pk)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous:
+            return encode_cursor(self.object_list[0].pk)
+        return None
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинация по убыванию id.
+
+    Каждая страница выбирается одним диапазонным запросом
+    по индексу (author, -id), без OFFSET.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или до курсора before."""
+        if before is not None:
+            queryset = self.queryset.filter(
+                pk__gt=decode_cursor(before)
+            ).order_by('pk')
+            object_list = list(queryset[:self.per_page + 1])
+            has_previous = len(object_list) > self.per_page
+            object_list = object_list[:self.per_page][::-1]
+            return CursorPage(object_list, bool(object_list), has_previous)
+        queryset = self.queryset.order_by('-pk')
+        if after is not None:
+            queryset = queryset.filter(pk__lt=decode_cursor(after))
+        object_list = list(queryset[:self.per_page + 1])
+        has_next = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        has_previous = after is not None and bool(object_list)
+        return CursorPage(object_list, has_next, has_previous)
+
+
+class CursorPaginationMixin:
+    """Подменяет постраничную разбивку ListView на курсорную."""
+
+    paginator_class = CursorPaginator
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.paginator_class(queryset, page_size)
+        try:
+            page = paginator.get_page(
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+            )
+        except ValueError as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
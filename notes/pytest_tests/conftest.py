@@ -1,10 +1,13 @@
 import pytest
 
+from django.conf import settings
 # Импортируем класс клиента.
 from django.test.client import Client
 
 # Импортируем модель заметки, чтобы создать экземпляр.
+from notes.jobs import enqueue, run_next
 from notes.models import Note
+from notes.ratelimit import BACKENDS
 
 
 @pytest.fixture
@@ -60,3 +63,31 @@ def form_data():
         'text': 'Новый текст',
         'slug': 'new-slug'
     }
+
+
+@pytest.fixture
+def many_notes(author):
+    # Заметок больше, чем помещается на одну страницу списка.
+    return Note.objects.bulk_create(
+        Note(
+            title=f'Заметка {index}',
+            text='Просто текст.',
+            slug=f'note-{index}',
+            author=author,
+        )
+        for index in range(settings.NOTES_PAGE_SIZE + 5)
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    # Вёдра живут в памяти процесса и иначе переходят из теста в тест.
+    BACKENDS['local'].reset()
+
+
+@pytest.fixture
+def export_job(settings, tmp_path, author, note):
+    # Выполненная задача выгрузки с файлом во временном каталоге.
+    settings.NOTES_JOB_DIR = tmp_path
+    enqueue('export_notes', {'format': 'jsonl'}, author=author)
+    return run_next()
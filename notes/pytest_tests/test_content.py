@@ -1,8 +1,21 @@
+import csv
+import io
+import json
+import zipfile
+from http import HTTPStatus
+
 import pytest
 
+from django.conf import settings
+from django.db import connection
 from django.urls import reverse
 
+from notes import search
+from notes.cache import notes_list_cache
 from notes.forms import NoteForm
+from notes.models import Note
+from notes.tags import get_folder, set_note_tags
+from notes.warmup import warm_template_cache
 
 
 @pytest.mark.parametrize(
@@ -46,3 +59,175 @@ def test_pages_contains_form(author_client, name, args):
     assert 'form' in response.context
     # Проверяем, что объект формы относится к нужному классу.
     assert isinstance(response.context['form'], NoteForm)
+
+
+def test_notes_list_is_paginated_by_cursor(author_client, many_notes):
+    url = reverse('notes:list')
+    response = author_client.get(url)
+    first_page = list(response.context['object_list'])
+    # На первой странице самые новые заметки, не больше NOTES_PAGE_SIZE:
+    assert len(first_page) == settings.NOTES_PAGE_SIZE
+    assert first_page[0].id > first_page[-1].id
+    page = response.context['page_obj']
+    assert page.has_next() and not page.has_previous()
+    # Переходим на следующую страницу по курсору:
+    response = author_client.get(url, {'after': page.next_cursor})
+    second_page = list(response.context['object_list'])
+    assert len(second_page) == len(many_notes) - settings.NOTES_PAGE_SIZE
+    assert second_page[0].id < first_page[-1].id
+    # И возвращаемся назад:
+    page = response.context['page_obj']
+    response = author_client.get(url, {'before': page.previous_cursor})
+    assert list(response.context['object_list']) == first_page
+
+
+def test_notes_list_invalid_cursor(author_client):
+    response = author_client.get(reverse('notes:list'), {'after': '!!!'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_notes_list_does_not_load_text(author_client, note):
+    response = author_client.get(reverse('notes:list'))
+    listed_note = response.context['object_list'][0]
+    # Текст заметки не выбирается из базы для страницы списка:
+    assert 'text' in listed_note.get_deferred_fields()
+
+
+def test_notes_list_cache_is_invalidated(author_client, author, note):
+    url = reverse('notes:list')
+    author_client.get(url)
+    hits = notes_list_cache.stats()['hits']
+    # Повторный запрос отдаётся из кэша:
+    response = author_client.get(url)
+    assert notes_list_cache.stats()['hits'] == hits + 1
+    assert note.title in response.content.decode()
+    # Новая заметка сбрасывает кэш списка автора:
+    Note.objects.create(
+        title='Свежая заметка', text='Текст', slug='fresh', author=author
+    )
+    response = author_client.get(url)
+    assert notes_list_cache.stats()['hits'] == hits + 1
+    assert 'Свежая заметка' in response.content.decode()
+
+
+def test_export_jsonl_and_csv(author_client, note, not_author):
+    Note.objects.create(
+        title='Чужая', text='Текст', slug='alien', author=not_author
+    )
+    url = reverse('notes:export')
+    response = author_client.get(url, {'format': 'jsonl'})
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    # В выгрузке только заметки автора:
+    assert [json.loads(line)['slug'] for line in lines] == [note.slug]
+    response = author_client.get(url, {'format': 'csv'})
+    rows = list(csv.DictReader(io.StringIO(
+        b''.join(response.streaming_content).decode()
+    )))
+    assert [row['title'] for row in rows] == [note.title]
+
+
+def test_export_markdown_zip(author_client, note):
+    response = author_client.get(reverse('notes:export'), {'format': 'md'})
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+    content = archive.read(f'{note.slug}.md').decode()
+    assert content == f'# {note.title}\n\n{note.text}\n'
+
+
+@pytest.mark.parametrize('use_fts', (True, False))
+def test_search_notes(monkeypatch, author, not_author, use_fts):
+    monkeypatch.setattr(search, '_use_fts', lambda using: use_fts)
+    Note.objects.create(
+        title='Рецепт борща', text='Свёкла и <капуста>', slug='borsch',
+        author=author,
+    )
+    Note.objects.create(
+        title='Чужой борщ', text='Свёкла', slug='alien', author=not_author
+    )
+    results = search.search_notes(author, 'Свёкла', limit=10)
+    # Находятся только заметки автора, с подсветкой и экранированием:
+    assert [result.slug for result in results] == ['borsch']
+    assert '<mark>Свёкла</mark>' in results[0].snippet
+    assert '&lt;капуста&gt;' in results[0].snippet
+
+
+def test_search_index_matches_notes(author_client, author, note):
+    note.title = 'Новый заголовок'
+    note.save()
+    upload = io.BytesIO(
+        '{"title": "Из файла", "text": "Импорт"}\n'.encode()
+    )
+    upload.name = 'notes.jsonl'
+    author_client.post(reverse('notes:import'), {'file': upload})
+    Note.objects.filter(title='Из файла').delete()
+    with connection.cursor() as cursor:
+        # Индекс совпадает с содержимым заметок:
+        cursor.execute(
+            f"INSERT INTO {search.FTS_TABLE}({search.FTS_TABLE}, rank) "
+            f"VALUES ('integrity-check', 1)"
+        )
+        # Записи в notes_note не зависят от функций приложения:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND sql LIKE '%note_text%'"
+        )
+        assert cursor.fetchall() == []
+    assert [
+        result.pk for result in search.search_notes(author, 'Новый', 10)
+    ] == [note.pk]
+
+
+def test_search_index_follows_updates(author_client, note):
+    url = reverse('notes:search')
+    response = author_client.get(url, {'q': 'заметки'})
+    assert [result.pk for result in response.context['results']] == [note.pk]
+    note.text = 'Совсем другое содержание'
+    note.save()
+    response = author_client.get(url, {'q': 'заметки'})
+    assert response.context['results'] == []
+
+
+@pytest.mark.parametrize('name', ('notes:search', 'notes:async_search'))
+def test_search_pages(author_client, author, name):
+    size = settings.NOTES_PAGE_SIZE
+    Note.objects.bulk_create(
+        Note(title=f'Поиск {number}', text='Текст', slug=f'search-{number}',
+             author=author)
+        for number in range(size + 1)
+    )
+    search.rebuild_search_index()
+    url = reverse(name)
+    first = author_client.get(url, {'q': 'Поиск'}).context
+    second = author_client.get(url, {'q': 'Поиск', 'page': 2}).context
+    assert (len(first['results']), first['has_next']) == (size, True)
+    assert (len(second['results']), second['has_next']) == (1, False)
+    assert second['page'] == 2
+    assert author_client.get(
+        url, {'q': 'Поиск', 'page': 0}
+    ).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_warm_template_cache():
+    names = warm_template_cache()
+    # Прогреваются все шаблоны каталога templates/:
+    assert {'base.html', 'includes/header.html', 'notes/list.html'} <= set(
+        names
+    )
+
+
+def test_notes_list_filters_by_tag_and_folder(author_client, author, note):
+    tagged = Note.objects.create(
+        title='С тегом', text='Текст', slug='tagged', author=author
+    )
+    set_note_tags(tagged, ['дом'])
+    note.folder = get_folder(author.pk, 'Работа')
+    note.save()
+    url = reverse('notes:list')
+    response = author_client.get(url, {'tag': 'дом'})
+    assert list(response.context['object_list']) == [tagged]
+    assert list(response.context['user_tags']) == [('дом', 1)]
+    response = author_client.get(url, {'folder': 'Работа'})
+    assert list(response.context['object_list']) == [note]
+    # Ответ без фильтра не берётся из кэша отфильтрованного списка:
+    response = author_client.get(url)
+    assert 'С тегом' in response.content.decode()
+    assert 'Заголовок' in response.content.decode()
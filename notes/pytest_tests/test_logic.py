@@ -1,11 +1,35 @@
+import csv
+import gzip
+from datetime import timedelta
 from http import HTTPStatus
 
 import pytest
+from asgiref.sync import SyncToAsync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory
 from django.urls import reverse
-from notes.models import Note
+from notes import search, translit
+from notes.api import NoteDetailApi
+from notes.auth import user_cache
+from notes.checks import check_sqlite
+from notes.compression import RAW, ZLIB, recompress_notes
+from notes.revisions import revision_text
+from notes.db import retry_on_locked
+from notes import jobs
+from notes.models import Note, NoteJob, NoteRevision, Tag
 from notes.forms import WARNING
+from notes.slugs import allocate_slugs
+from notes.management.commands.run_note_worker import restart_dead
+from notes.sync import purge_tombstones
 from pytils.translit import slugify
 
+from yanote.compression import minify_html
+from yanote.middleware import DuplicateQueryMiddleware
+
 # Импорты для проверки редиректа и ошибки формы
 from pytest_django.asserts import assertRedirects, assertFormError
 
@@ -121,3 +145,614 @@ def test_other_user_cant_delete_note(
     response = not_author_client.post(url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Note.objects.count() == 1
+
+
+def test_generated_slug_collision_gets_suffix(
+        author_client, author, form_data):
+    url = reverse('notes:add')
+    form_data.pop('slug')
+    base_slug = slugify(form_data['title'])
+    # Заметка с таким же автоматическим slug уже есть:
+    Note.objects.create(
+        title=form_data['title'], text='Текст', author=author
+    )
+    response = author_client.post(url, data=form_data)
+    # Вместо ошибки формы новая заметка получает свободный суффикс:
+    assertRedirects(response, reverse('notes:success'))
+    assert Note.objects.filter(slug=f'{base_slug}-2').exists()
+
+
+@pytest.mark.django_db
+def test_allocate_slugs_in_one_query(author, django_assert_num_queries):
+    Note.objects.create(title='Заметка', text='Текст', author=author)
+    Note.objects.create(
+        title='Заметка', text='Текст', slug='zametka-7', author=author
+    )
+    with django_assert_num_queries(1):
+        slugs = allocate_slugs(Note, ['Заметка', 'Заметка', 'Другая'])
+    assert slugs == ['zametka-8', 'zametka-9', 'drugaya']
+
+
+def test_cached_slugify_matches_pytils():
+    title = 'Список покупок на неделю'
+    hits = translit.cache_stats()['hits']
+    assert translit.slugify(title) == slugify(title)
+    assert translit.slugify(title) == slugify(title)
+    # Второй вызов взят из кэша:
+    assert translit.cache_stats()['hits'] >= hits + 1
+
+
+def test_bulk_import_reports_row_errors(author_client, author, note):
+    rows = (
+        '{"title": "Первая", "text": "Текст"}\n'
+        '{"title": "Первая", "text": "Текст"}\n'
+        'не json\n'
+        f'{{"title": "Занятый", "text": "Текст", "slug": "{note.slug}"}}\n'
+        '{"title": "Без текста"}\n'
+    )
+    upload = SimpleUploadedFile('notes.jsonl', rows.encode())
+    response = author_client.post(reverse('notes:import'), {'file': upload})
+    result = response.context['result']
+    # Ошибочные строки не мешают импорту остальных:
+    assert result.created == 2
+    assert [line for line, _ in result.errors] == [3, 4, 5]
+    assert set(
+        Note.objects.filter(title='Первая').values_list('slug', flat=True)
+    ) == {'pervaya', 'pervaya-2'}
+
+
+@pytest.mark.parametrize(
+    'name, content, created, error_lines',
+    (
+        # Файл декодируется блоками: ошибка всплывает до первой строки.
+        ('notes.jsonl', '{"title": "Первая", "text": "Текст"}\n'.encode()
+         + b'\xff\xfe\n', 0, [1]),
+        ('notes.csv', 'title,text\nПервая,Текст\nВторая,Длинный текст\n'
+         .encode(), 1, [3]),
+    ),
+)
+def test_import_reports_unreadable_file(
+        author_client, author, name, content, created, error_lines
+):
+    upload = SimpleUploadedFile(name, content)
+    old_limit = csv.field_size_limit(10)
+    try:
+        response = author_client.post(
+            reverse('notes:import'), {'file': upload}
+        )
+    finally:
+        csv.field_size_limit(old_limit)
+    result = response.context['result']
+    # Вместо ошибки 500 — строка с ошибкой в отчёте:
+    assert result.created == created
+    assert [line for line, _ in result.errors] == error_lines
+
+
+def test_import_csv_with_bom(author_client, author):
+    # Excel сохраняет CSV в UTF-8 с BOM перед заголовком.
+    upload = SimpleUploadedFile(
+        'notes.csv', 'title,text\nИз Excel,Текст\n'.encode('utf-8-sig')
+    )
+    response = author_client.post(reverse('notes:import'), {'file': upload})
+    result = response.context['result']
+    assert (result.created, result.errors) == (1, [])
+
+
+@pytest.mark.parametrize('encoding', ('utf-8', 'utf-8-sig'))
+def test_import_notes_command(author, tmp_path, encoding):
+    path = tmp_path / 'notes.csv'
+    path.write_text(
+        'title,text,slug\nИз CSV,Текст,from-csv\nЕщё одна,Текст,\n',
+        encoding=encoding,
+    )
+    call_command('import_notes', author.username, str(path), chunk_size=1)
+    assert set(
+        Note.objects.filter(author=author).values_list('slug', flat=True)
+    ) == {'from-csv', 'eschyo-odna'}
+
+
+def test_retry_on_locked(settings):
+    settings.SQLITE_LOCK_BACKOFF = 0
+    calls = []
+
+    @retry_on_locked
+    def write():
+        calls.append(1)
+        if len(calls) < 3:
+            raise OperationalError('database is locked')
+        return 'ok'
+
+    # Запись повторяется, пока база занята:
+    assert write() == 'ok'
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize('method', ('patch', 'put'))
+def test_api_update_retries_on_locked(
+    settings, monkeypatch, author_client, note, method
+):
+    settings.SQLITE_LOCK_BACKOFF = 0
+    save_form = NoteDetailApi.save_form
+    calls = []
+
+    def locked_once(self, *args):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OperationalError('database is locked')
+        return save_form(self, *args)
+
+    monkeypatch.setattr(NoteDetailApi, 'save_form', locked_once)
+    response = getattr(author_client, method)(
+        reverse('notes:api_detail', args=(note.slug,)),
+        data={'text': 'Новый текст'}, content_type='application/json',
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert len(calls) == 2
+
+
+def test_api_create_and_select_fields(author_client, author, form_data):
+    url = reverse('notes:api_list')
+    response = author_client.post(
+        url, data=form_data, content_type='application/json'
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert Note.objects.get().author == author
+    # Клиент получает только запрошенные поля:
+    response = author_client.get(url, {'fields': 'slug,title'})
+    assert response.json()['results'] == [
+        {'slug': form_data['slug'], 'title': form_data['title']}
+    ]
+
+
+def test_api_respects_ownership(not_author_client, client, note):
+    url = reverse('notes:api_detail', args=(note.slug,))
+    assert not_author_client.delete(url).status_code == HTTPStatus.NOT_FOUND
+    assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+    assert Note.objects.count() == 1
+
+
+def test_api_batch(author_client, note):
+    url = reverse('notes:api_batch')
+    batch = {
+        'create': [
+            {'title': 'Первая', 'text': 'Текст'},
+            {'title': 'Первая', 'text': 'Текст'},
+        ],
+        'update': [{'slug': note.slug, 'text': 'Новый текст'}],
+    }
+    response = author_client.post(
+        url, data=batch, content_type='application/json'
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert [item['slug'] for item in response.json()['created']] == [
+        'pervaya', 'pervaya-2'
+    ]
+    note.refresh_from_db()
+    assert note.text == 'Новый текст'
+    # Ошибка в любой операции отменяет весь пакет:
+    batch = {
+        'create': [{'title': 'Вторая', 'text': 'Текст'}],
+        'delete': ['pervaya', 'no-such-note'],
+    }
+    response = author_client.post(
+        url, data=batch, content_type='application/json'
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert Note.objects.count() == 3
+
+
+def test_api_batch_limit(settings, author_client, note):
+    settings.NOTES_BATCH_LIMIT = 2
+    batch = {
+        'create': [{'title': 'Первая', 'text': 'Текст'}] * 2,
+        'delete': [note.slug],
+    }
+    response = author_client.post(
+        reverse('notes:api_batch'), data=batch,
+        content_type='application/json',
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Note.objects.count() == 1
+
+
+@pytest.mark.parametrize(
+    'batch, error',
+    (
+        ({'create': 5}, 'create: ожидается список'),
+        ({'update': {'slug': 'x'}}, 'update: ожидается список'),
+        ({'update': [1]}, 'update[0]: Для изменения нужен slug заметки'),
+        ({'create': ['x']}, 'create[0]: Ожидается JSON-объект'),
+        ({'delete': [{'slug': 'x'}]}, 'delete[0]: ожидается slug заметки'),
+    ),
+)
+def test_api_batch_rejects_malformed_operations(
+    author_client, note, batch, error
+):
+    response = author_client.post(
+        reverse('notes:api_batch'), data=batch,
+        content_type='application/json',
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['error'] == error
+    assert Note.objects.count() == 1
+
+
+def test_sync_returns_only_changes(settings, author_client, author, note):
+    settings.NOTES_SYNC_PAGE_SIZE = 2
+    url = reverse('notes:sync')
+    other = Note.objects.create(
+        title='Вторая', text='Текст', slug='second', author=author
+    )
+    feed = author_client.get(url).json()
+    assert [change['note']['slug'] for change in feed['changes']] == [
+        note.slug, other.slug
+    ]
+    cursor = feed['cursor']
+    # Без изменений синхронизация ничего не возвращает:
+    assert author_client.get(url, {'since': cursor}).json()['changes'] == []
+    note.text = 'Изменённый текст'
+    note.save()
+    other.delete()
+    Note.objects.create(
+        title='Третья', text='Текст', slug='third', author=author
+    )
+    feed = author_client.get(url, {'since': cursor}).json()
+    assert feed['has_more']
+    changes = feed['changes']
+    feed = author_client.get(url, {'since': feed['cursor']}).json()
+    changes += feed['changes']
+    assert not feed['has_more']
+    assert [
+        (change['action'], change.get('slug') or change['note']['slug'])
+        for change in changes
+    ] == [
+        ('updated', note.slug), ('deleted', 'second'), ('created', 'third')
+    ]
+
+
+@pytest.mark.django_db
+def test_sync_sequence_ignores_stale_instance(author_client, author, note):
+    url = reverse('notes:sync')
+    cursor = author_client.get(url).json()['cursor']
+    stale = Note.objects.get(pk=note.pk)
+    note.text = 'Первая правка'
+    note.save()
+    # Устаревшие номера из памяти не откатывают номер изменения:
+    stale.title = 'Вторая правка'
+    stale.save()
+    saved = Note.objects.get(pk=note.pk)
+    assert saved.change_seq > stale.change_seq
+    assert saved.created_seq == stale.created_seq > 0
+    changes = author_client.get(url, {'since': cursor}).json()['changes']
+    assert [change['action'] for change in changes] == ['updated']
+
+
+def test_recompression_is_not_a_sync_change(author_client, note):
+    url = reverse('notes:sync')
+    cursor = author_client.get(url).json()['cursor']
+    recompress_notes(Note.objects.all())
+    feed = author_client.get(url, {'since': cursor}).json()
+    assert feed['changes'] == []
+
+
+@pytest.mark.django_db
+def test_sync_resets_after_tombstone_purge(
+    settings, author_client, author, note
+):
+    url = reverse('notes:sync')
+    cursor = author_client.get(url).json()['cursor']
+    Note.objects.create(
+        title='Вторая', text='Текст', slug='second', author=author
+    ).delete()
+    settings.NOTES_TOMBSTONE_KEEP = timedelta(0)
+    assert purge_tombstones() == 1
+    # Клиент не узнает об удалении, поэтому получает всё заново.
+    feed = author_client.get(url, {'since': cursor}).json()
+    assert feed['reset']
+    assert [change['note']['slug'] for change in feed['changes']] == [
+        note.slug
+    ]
+    feed = author_client.get(url, {'since': feed['cursor']}).json()
+    assert not feed['reset']
+    assert feed['changes'] == []
+
+
+@pytest.mark.django_db
+def test_duplicate_queries_are_logged(settings, caplog, author):
+    settings.QUERY_DEBUG = True
+
+    def view(request):
+        # Типичный N+1: одинаковый запрос в цикле.
+        for _ in range(2):
+            list(Note.objects.filter(author=author))
+        return HttpResponse()
+
+    DuplicateQueryMiddleware(view)(RequestFactory().get('/'))
+    assert 'Запрос выполнен 2 раз' in caplog.text
+    assert 'test_logic.py' in caplog.text
+
+
+@pytest.mark.django_db
+def test_password_change_invalidates_cached_user(
+        settings, author_client, author
+):
+    settings.AUTH_USER_CACHE_TIMEOUT = 60
+    settings.AUTHENTICATION_BACKENDS = [
+        'notes.auth.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+    author_client.force_login(author, backend='notes.auth.CachedModelBackend')
+    url = reverse('notes:list')
+    author_client.get(url)
+    assert user_cache.get(author.pk) == author
+    author.set_password('new-password')
+    author.save()
+    assert user_cache.get(author.pk) is None
+    # Хэш сессии больше не совпадает — автора разлогинивает.
+    response = author_client.get(url)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+def test_long_text_is_stored_compressed(author):
+    long_text = 'INFO запрос обработан за 12 мс\n' * 200
+    Note.objects.create(title='Лог', text=long_text, slug='log', author=author)
+    Note.objects.create(
+        title='Коротко', text='Текст', slug='short', author=author
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT slug, text FROM notes_note ORDER BY slug')
+        stored = dict(cursor.fetchall())
+    assert stored['log'][:1] == ZLIB
+    assert len(stored['log']) < len(long_text) // 10
+    assert stored['short'] == RAW + 'Текст'.encode()
+    assert Note.objects.get(slug='log').text == long_text
+    # Полнотекстовый индекс видит распакованный текст:
+    results = search.search_notes(author, 'обработан', limit=10)
+    assert [result.slug for result in results] == ['log']
+
+
+def test_responses_are_compressed(author_client, many_notes):
+    url = reverse('notes:list')
+    plain = author_client.get(url)
+    response = author_client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert gzip.decompress(response.content) == plain.content
+    # Потоковая выгрузка сжимается по мере выдачи:
+    export = author_client.get(
+        reverse('notes:export'), HTTP_ACCEPT_ENCODING='gzip'
+    )
+    assert export['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(b''.join(export.streaming_content)).splitlines()
+    assert len(lines) == len(many_notes)
+
+
+@pytest.mark.parametrize('name', ('notes:search', 'notes:async_search'))
+def test_search_is_not_compressed(author_client, many_notes, name):
+    response = author_client.get(
+        reverse(name), {'q': 'Текст'}, HTTP_ACCEPT_ENCODING='gzip'
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert not response.has_header('Content-Encoding')
+
+
+def test_middleware_chain_stays_async():
+    # Синхронное звено обернуло бы всю цепочку в SyncToAsync,
+    # и асинхронные страницы снова занимали бы поток.
+    chain = ASGIHandler()._middleware_chain
+    assert not isinstance(chain, SyncToAsync)
+
+
+def test_minify_html_keeps_preformatted_text():
+    html = (
+        '<ul>\n    <li>Раз</li>\n\n    <li>Два</li>\n</ul>\n'
+        '<pre>  a\n  b</pre>'
+    )
+    assert minify_html(html) == (
+        '<ul>\n<li>Раз</li>\n<li>Два</li>\n</ul>\n<pre>  a\n  b</pre>'
+    )
+
+
+@pytest.mark.django_db
+def test_revision_history(settings, author_client, note):
+    settings.NOTES_REVISION_SNAPSHOT_EVERY = 3
+    settings.NOTES_REVISION_LIMIT = 5
+    lines = [f'Строка {index}\n' for index in range(100)]
+    versions = [note.text]
+    for index in range(8):
+        lines[index * 10] = f'Правка {index}\n'
+        note.text = ''.join(lines)
+        note.save()
+        versions.append(note.text)
+    # Хранятся только последние версии, каждая третья — целиком:
+    revisions = NoteRevision.objects.filter(note=note).order_by('number')
+    assert [revision.number for revision in revisions] == [4, 5, 6, 7, 8]
+    assert [revision.is_snapshot for revision in revisions] == [
+        False, False, True, False, False
+    ]
+    # Разница хранит правку, а не весь текст:
+    assert len(revisions[0].data) < len(versions[4]) // 10
+    for number in range(4, 9):
+        assert revision_text(note, number) == versions[number - 1]
+    response = author_client.get(
+        reverse('notes:history', args=(note.slug,)), {'revision': 5}
+    )
+    assert response.context['revision_text'] == versions[4]
+
+
+def test_revision_of_stale_copy(note):
+    first = Note.objects.get(pk=note.pk)
+    second = Note.objects.get(pk=note.pk)
+    first.text = 'Первая правка'
+    first.save()
+    # Вторая копия загружена до первой правки, но заменяет уже её:
+    second.text = 'Вторая правка'
+    second.save()
+    assert revision_text(second, 1) == 'Текст заметки'
+    assert revision_text(second, 2) == 'Первая правка'
+
+
+@pytest.mark.parametrize('backend', ('local', 'cache'))
+def test_rate_limit(settings, author_client, form_data, backend):
+    settings.RATE_LIMIT_BACKEND = backend
+    settings.RATE_LIMITS = {'notes:write': '2/m'}
+    url = reverse('notes:add')
+    form_data['slug'] = ''
+    for _ in range(2):
+        assert author_client.post(url, form_data).status_code == (
+            HTTPStatus.FOUND
+        )
+    response = author_client.post(url, form_data)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    # Жетон восстанавливается за 30 секунд:
+    assert response['Retry-After'] == '30'
+    # Чтение не ограничивается:
+    assert author_client.get(url).status_code == HTTPStatus.OK
+    # Импорт тратит те же жетоны, что и форма:
+    upload = SimpleUploadedFile('notes.jsonl', b'')
+    assert author_client.post(
+        reverse('notes:import'), {'file': upload}
+    ).status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_background_export(settings, tmp_path, author_client, note):
+    settings.NOTES_JOB_DIR = tmp_path
+    response = author_client.post(
+        reverse('notes:export') + '?format=jsonl'
+    )
+    assert response.status_code == HTTPStatus.ACCEPTED
+    status_url = response['Location']
+    assert author_client.get(status_url).json()['status'] == NoteJob.QUEUED
+    call_command('run_note_worker', '--once')
+    status = author_client.get(status_url).json()
+    assert status['status'] == NoteJob.DONE
+    download = author_client.get(status['download_url'])
+    streamed = author_client.get(reverse('notes:export'))
+    assert b''.join(download.streaming_content) == b''.join(
+        streamed.streaming_content
+    )
+
+
+def test_non_sqlite_database_fails_check(monkeypatch):
+    assert check_sqlite(None) == []
+    monkeypatch.setattr(connection, 'vendor', 'postgresql')
+    assert [error.id for error in check_sqlite(None)] == ['notes.E001']
+
+
+def test_worker_restarts_dead_processes():
+    class Process:
+        def __init__(self, alive):
+            self.alive = alive
+
+        def is_alive(self):
+            return self.alive
+
+        def join(self):
+            pass
+
+    alive, dead = Process(True), Process(False)
+    processes = [alive, dead]
+    assert restart_dead(processes, lambda: Process(True)) == 1
+    assert processes[0] is alive
+    assert processes[1] is not dead and processes[1].is_alive()
+
+
+@pytest.mark.django_db
+def test_failed_job_is_retried(settings, monkeypatch):
+    settings.NOTES_JOB_MAX_ATTEMPTS = 2
+    calls = []
+
+    def flaky(job):
+        calls.append(job.attempts)
+        if len(calls) == 1:
+            raise ValueError('Сбой')
+        return {'ok': True}
+
+    monkeypatch.setitem(jobs.TASKS, 'flaky', flaky)
+    job = jobs.enqueue('flaky')
+    jobs.run_next()
+    job.refresh_from_db()
+    # Повтор откладывается, пока не пройдёт пауза:
+    assert job.status == NoteJob.QUEUED
+    assert 'ValueError' in job.error
+    assert jobs.run_next() is None
+    NoteJob.objects.update(run_after=job.created_at)
+    jobs.run_next()
+    job.refresh_from_db()
+    assert (job.status, job.result) == (NoteJob.DONE, {'ok': True})
+    assert calls == [1, 2]
+
+
+@pytest.mark.parametrize(
+    'name, content',
+    (
+        ('notes.jsonl', '{"title": "Фон", "text": "Текст"}\n'.encode()),
+        ('notes.csv', 'title,text\nФон,Текст\n'.encode('utf-8-sig')),
+    ),
+)
+def test_large_import_runs_in_background(
+        settings, tmp_path, author_client, name, content
+):
+    settings.NOTES_JOB_DIR = tmp_path
+    settings.NOTES_IMPORT_BACKGROUND_SIZE = 10
+    upload = SimpleUploadedFile(name, content)
+    response = author_client.post(reverse('notes:import'), {'file': upload})
+    job = response.context['job']
+    assert not Note.objects.filter(title='Фон').exists()
+    jobs.run_next()
+    job.refresh_from_db()
+    assert job.result == {'created': 1, 'errors': []}
+    # Загруженный файл удаляется после импорта:
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_tag_counts_follow_notes(author_client, author, form_data):
+    author_client.post(
+        reverse('notes:add'), {**form_data, 'tags': 'дом, работа, дом'}
+    )
+    note = Note.objects.get()
+    author_client.post(
+        reverse('notes:add'),
+        {'title': 'Вторая', 'text': 'Текст', 'slug': '', 'tags': 'дом'},
+    )
+    counts = dict(Tag.objects.values_list('name', 'note_count'))
+    assert counts == {'дом': 2, 'работа': 1}
+    # Правка заметки убирает тег, удаление — пересчитывает оставшиеся:
+    author_client.post(
+        reverse('notes:edit', args=(note.slug,)),
+        {**form_data, 'tags': 'работа', 'folder': 'Проекты'},
+    )
+    assert dict(Tag.objects.values_list('name', 'note_count')) == {
+        'дом': 1, 'работа': 1
+    }
+    assert Note.objects.get(pk=note.pk).folder.name == 'Проекты'
+    note.delete()
+    assert dict(Tag.objects.values_list('name', 'note_count')) == {
+        'дом': 1, 'работа': 0
+    }
+    # Массовое удаление тоже уменьшает счётчики, без запросов на заметку:
+    Note.objects.filter(author=author).delete()
+    assert set(Tag.objects.values_list('note_count', flat=True)) == {0}
+
+
+def test_missing_export_file_is_not_found(author_client, export_job):
+    jobs.job_path(export_job.result['file']).unlink()
+    response = author_client.get(
+        reverse('notes:job_download', args=(export_job.pk,))
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert 'error' in response.json()
+
+
+def test_failed_import_removes_upload(settings, tmp_path, author):
+    settings.NOTES_JOB_DIR = tmp_path
+    (tmp_path / 'broken.jsonl').write_text('{"title": "Т", "text": "Т"}\n')
+    job = jobs.enqueue(
+        'import_notes', {'file': 'broken.jsonl', 'format': 'unknown'},
+        author=author, max_attempts=1,
+    )
+    jobs.run_next()
+    job.refresh_from_db()
+    assert job.status == NoteJob.FAILED
+    assert list(tmp_path.iterdir()) == []
@@ -1,8 +1,22 @@
+import re
+import time
+
 import pytest
 from http import HTTPStatus
+from django.conf import settings
+from django.core.cache import caches
+from django.test.client import Client
 from django.urls import reverse
+from django.utils.http import http_date
 from pytest_django.asserts import assertRedirects
 
+from notes.cache import notes_list_cache
+from notes.models import Note
+from notes.query_budget import (
+    QUERY_BUDGETS, check_query_budget, iter_url_names
+)
+from yanote.metrics import registry
+
 
 @pytest.mark.parametrize(
     'name',  # Имя параметра функции.
@@ -27,7 +41,7 @@ def test_pages_availability_for_anonymous_user(client, name):
 )
 @pytest.mark.parametrize(
     'name',
-    ('notes:detail', 'notes:edit', 'notes:delete'),
+    ('notes:detail', 'notes:edit', 'notes:delete', 'notes:history'),
 )
 def test_pages_availability_for_different_users(
         parametrized_client, name, note, expected_status
@@ -43,6 +57,7 @@ def test_pages_availability_for_different_users(
         ('notes:detail', pytest.lazy_fixture('slug_for_args')),
         ('notes:edit', pytest.lazy_fixture('slug_for_args')),
         ('notes:delete', pytest.lazy_fixture('slug_for_args')),
+        ('notes:history', pytest.lazy_fixture('slug_for_args')),
         ('notes:add', None),
         ('notes:success', None),
         ('notes:list', None),
@@ -56,3 +71,207 @@ def test_redirects(client, name, args):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.parametrize(
+    'name, args, last_modified',
+    (
+        ('notes:detail', pytest.lazy_fixture('slug_for_args'), True),
+        # Удаление старой заметки не меняет max(updated_at),
+        # поэтому список проверяется только по ETag.
+        ('notes:list', None, False),
+    ),
+)
+def test_conditional_get(author_client, note, name, args, last_modified):
+    url = reverse(name, args=args)
+    response = author_client.get(url)
+    assert response.has_header('ETag')
+    assert response.has_header('Last-Modified') == last_modified
+    # Повторный запрос с тем же ETag получает пустой ответ 304:
+    response = author_client.get(
+        url, HTTP_IF_NONE_MATCH=response['ETag']
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_list_etag_changes_after_edit(author_client, note):
+    url = reverse('notes:list')
+    etag = author_client.get(url)['ETag']
+    note.title = 'Другой заголовок'
+    note.save()
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+def test_list_revalidates_after_deleting_older_note(
+    author_client, author, note
+):
+    url = reverse('notes:list')
+    Note.objects.create(
+        title='Новая', text='Текст', slug='newer', author=author
+    )
+    author_client.get(url)
+    note.delete()
+    # Клиент, который перепроверяет только по времени:
+    response = author_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_performance_metrics(settings, author, note, admin_client):
+    settings.PERFORMANCE_METRICS = True
+    registry.reset()
+    client = Client()
+    client.force_login(author)
+    response = client.get(reverse('notes:detail', args=(note.slug,)))
+    # В ответе есть разбивка времени по этапам:
+    assert 'db;dur=' in response['Server-Timing']
+    assert 'render;dur=' in response['Server-Timing']
+    # Метрики доступны только персоналу:
+    assert client.get(reverse('metrics')).status_code == HTTPStatus.FOUND
+    response = admin_client.get(reverse('metrics'))
+    assert (
+        'yanote_request_duration_seconds_count{view="notes:detail"} 1'
+        in response.content.decode()
+    )
+
+
+def test_list_cache_metrics(author_client, admin_client, note):
+    registry.reset()
+    url = reverse('notes:list')
+    author_client.get(url)
+    author_client.get(url)
+    metrics = admin_client.get(reverse('metrics')).content.decode()
+    assert 'yanote_notes_list_cache_hits_total 1' in metrics
+    assert 'yanote_notes_list_cache_misses_total 1' in metrics
+
+
+@pytest.mark.parametrize(
+    'parametrized_client, expected_status',
+    (
+        (pytest.lazy_fixture('not_author_client'), HTTPStatus.NOT_FOUND),
+        (pytest.lazy_fixture('author_client'), HTTPStatus.OK)
+    ),
+)
+@pytest.mark.parametrize(
+    'name', ('notes:async_detail', 'notes:async_api_detail')
+)
+def test_async_detail_availability(
+        parametrized_client, name, note, expected_status
+):
+    url = reverse(name, args=(note.slug,))
+    response = parametrized_client.get(url)
+    assert response.status_code == expected_status
+
+
+@pytest.mark.parametrize(
+    'name',
+    ('notes:async_list', 'notes:async_search', 'notes:async_api_list'),
+)
+def test_async_redirects(client, name):
+    login_url = reverse('users:login')
+    url = reverse(name)
+    assertRedirects(client.get(url), f'{login_url}?next={url}')
+
+
+def test_async_api_list(author_client, note):
+    response = author_client.get(reverse('notes:async_api_list'))
+    assert response.json()['results'] == [
+        {'id': note.id, 'slug': note.slug, 'title': note.title}
+    ]
+
+
+def test_every_url_has_query_budget():
+    assert {name for name, _ in iter_url_names()} == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize('url_name', QUERY_BUDGETS)
+def test_query_budget(url_name, author, note, export_job):
+    converters = dict(iter_url_names())[url_name]
+    kwargs = {'slug': note.slug} if 'slug' in converters else {}
+    if 'pk' in converters:
+        kwargs['pk'] = export_job.pk
+    url = reverse(url_name, kwargs=kwargs)
+    if url_name.endswith('search'):
+        url += '?q=заголовок'
+
+    def make_client():
+        client = Client()
+        client.force_login(author)
+        return client
+
+    def grow(size):
+        # Доводим число заметок автора до нужного размера.
+        count = Note.objects.filter(author=author).count()
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заголовок {index}', text='Текст',
+                slug=f'budget-{index}', author=author,
+            )
+            for index in range(count, size)
+        )
+        # bulk_create не отправляет сигналы: сбрасываем кэш списка сами.
+        notes_list_cache.invalidate(author.pk)
+
+    check_query_budget(url_name, url, make_client, grow)
+
+
+@pytest.mark.parametrize(
+    'name', ('notes:home', 'users:login', 'users:signup')
+)
+def test_anonymous_pages_are_cached(client, name):
+    caches[settings.NOTES_LIST_CACHE_ALIAS].clear()
+    url = reverse(name)
+    client.get(url)
+    response = client.get(url)
+    # Повторная выдача обходится без рендеринга шаблонов:
+    assert response.status_code == HTTPStatus.OK
+    assert not response.templates
+    assert 'Cookie' in response['Vary']
+
+
+@pytest.mark.parametrize(
+    'name, cache_control',
+    (('notes:home', 'public'), ('users:login', 'no-store')),
+)
+def test_anonymous_page_headers_do_not_depend_on_cache(
+        client, name, cache_control
+):
+    caches[settings.NOTES_LIST_CACHE_ALIAS].clear()
+    url = reverse(name)
+    miss = client.get(url)
+    hit = client.get(url)
+    assert miss['Cache-Control'] == hit['Cache-Control']
+    assert cache_control in hit['Cache-Control']
+
+
+def test_anonymous_page_with_query_is_not_cached(client):
+    cache = caches[settings.NOTES_LIST_CACHE_ALIAS]
+    cache.clear()
+    client.get(reverse('notes:home'), {'x': 'random'})
+    client.get(reverse('notes:home'), {'x': 'other'})
+    # Случайные параметры не засоряют кэш:
+    assert cache.get(f'notes:page:{reverse("notes:home")}') is None
+
+
+@pytest.mark.django_db
+def test_cached_login_page_has_valid_csrf_token(django_user_model):
+    django_user_model.objects.create_user('user', password='password')
+    caches[settings.NOTES_LIST_CACHE_ALIAS].clear()
+    url = reverse('users:login')
+    Client().get(url)
+    # Новый посетитель получает страницу из кэша со своим токеном:
+    client = Client(enforce_csrf_checks=True)
+    response = client.get(url)
+    assert not response.templates
+    token = re.search(
+        r'name="csrfmiddlewaretoken" value="([^"]+)"',
+        response.content.decode(),
+    ).group(1)
+    response = client.post(url, {
+        'username': 'user', 'password': 'password',
+        'csrfmiddlewaretoken': token,
+    })
+    assert response.status_code == HTTPStatus.FOUND
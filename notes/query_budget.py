@@ -0,0 +1,101 @@
+"""
+Бюджеты SQL-запросов для адресов проекта.
+
+Тесты проверяют, что страница укладывается в свой бюджет
+и что число запросов не растёт вместе с числом заметок.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+
+# Админка — отдельное приложение, её не проверяем.
+SKIPPED_NAMESPACES = ('admin',)
+
+# Сессия и пользователь — два запроса на любой странице
+# авторизованного пользователя.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:add': 2,
+    'notes:edit': 4,
+    'notes:detail': 4,
+    'notes:delete': 3,
+    'notes:history': 4,
+    'notes:list': 6,
+    'notes:success': 2,
+    'notes:import': 2,
+    'notes:export': 3,
+    'notes:search': 3,
+    'notes:api_list': 3,
+    'notes:api_detail': 3,
+    'notes:api_batch': 2,
+    'notes:sync': 5,
+    'notes:jobs': 3,
+    'notes:job': 3,
+    'notes:job_download': 3,
+    'notes:async_list': 5,
+    'notes:async_detail': 3,
+    'notes:async_search': 3,
+    'notes:async_api_list': 3,
+    'notes:async_api_detail': 3,
+    'metrics': 2,
+    'users:login': 2,
+    'users:logout': 4,
+    'users:signup': 2,
+}
+DATASET_SIZES = (1, 10, 50)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Страница делает больше запросов, чем ей положено."""
+
+
+def iter_url_names(patterns=None, namespace=None):
+    """Имена всех адресов проекта вместе с параметрами пути."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIPPED_NAMESPACES:
+                continue
+            yield from iter_url_names(
+                pattern.url_patterns, pattern.namespace or namespace
+            )
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = (
+                f'{namespace}:{pattern.name}' if namespace else pattern.name
+            )
+            yield name, tuple(pattern.pattern.converters)
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return [query['sql'] for query in queries.captured_queries]
+
+
+def check_query_budget(url_name, url, make_client, grow,
+                       sizes=DATASET_SIZES):
+    """
+    Проверяет бюджет адреса на наборах данных разного размера.
+
+    grow(size) доводит число заметок до size, make_client()
+    возвращает нового клиента автора.
+    """
+    budget = QUERY_BUDGETS[url_name]
+    counts = []
+    for size in sizes:
+        grow(size)
+        queries = count_queries(make_client(), url)
+        if len(queries) > budget:
+            raise QueryBudgetExceeded(
+                f'{url_name}: {len(queries)} запросов при бюджете {budget} '
+                f'на {size} заметках:\n' + '\n'.join(queries)
+            )
+        counts.append(len(queries))
+    if len(set(counts)) > 1:
+        raise QueryBudgetExceeded(
+            f'{url_name}: число запросов растёт вместе с данными: '
+            f'{dict(zip(sizes, counts))}'
+        )
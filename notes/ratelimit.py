@@ -0,0 +1,138 @@
+"""
+Ограничение частоты изменяющих запросов по алгоритму token bucket.
+
+У каждого ключа (пользователь или IP) есть ведро на N жетонов,
+которое наполняется со скоростью N за период; запрос забирает
+один жетон, а без жетонов получает ответ 429 с Retry-After.
+"""
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'30/m' -> (30, 60): ёмкость ведра и период в секундах."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period]
+
+
+def _take(state, now, capacity, period):
+    """Новое состояние ведра и сколько ждать следующего жетона."""
+    tokens, updated = state or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) * period / capacity
+
+
+class LocalBackend:
+    """Вёдра в памяти процесса: у каждого воркера свои."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, period):
+        now = time.monotonic()
+        with self._lock:
+            state, wait = _take(
+                self._buckets.get(key), now, capacity, period
+            )
+            self._buckets[key] = state
+            if len(self._buckets) > self.max_keys:
+                self._forget_full(now, period)
+        return wait
+
+    def _forget_full(self, now, period):
+        # Ведро, которое не трогали целый период, уже снова полное.
+        self._buckets = {
+            key: state for key, state in self._buckets.items()
+            if now - state[1] < period
+        }
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBackend:
+    """
+    Вёдра в кэше RATE_LIMIT_CACHE_ALIAS, общие для всех воркеров.
+
+    Чтение и запись не атомарны: при одновременных запросах
+    одного клиента может пройти на пару запросов больше.
+    """
+
+    prefix = 'ratelimit'
+
+    def consume(self, key, capacity, period):
+        cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+        cache_key = f'{self.prefix}:{key}'
+        state, wait = _take(
+            cache.get(cache_key), time.time(), capacity, period
+        )
+        cache.set(cache_key, state, math.ceil(period))
+        return wait
+
+
+BACKENDS = {'local': LocalBackend(), 'cache': CacheBackend()}
+
+
+def get_backend():
+    return BACKENDS[settings.RATE_LIMIT_BACKEND]
+
+
+def client_ip(request):
+    return request.META.get(settings.RATE_LIMIT_IP_HEADER, '').split(
+        ','
+    )[0].strip()
+
+
+def request_key(request, key):
+    """Пользователь, если он вошёл и key='user', иначе IP клиента."""
+    user = getattr(request, 'user', None)
+    if key == 'user' and user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def too_many_requests(wait):
+    response = HttpResponse(
+        'Слишком много запросов, повторите позже.',
+        status=429,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def rate_limit(scope, key='user'):
+    """
+    Ограничивает изменяющие запросы к представлению.
+
+    Частота берётся из RATE_LIMITS[scope]; GET и HEAD
+    не ограничиваются.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.RATE_LIMITS.get(scope)
+            if rate and request.method not in SAFE_METHODS:
+                capacity, period = parse_rate(rate)
+                wait = get_backend().consume(
+                    f'{scope}:{request_key(request, key)}', capacity, period
+                )
+                if wait:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,116 @@
+"""
+История правок заметок.
+
+Текущая версия хранится в самой заметке, прежние — в NoteRevision
+обратными разницами: версия n получается из версии n + 1.
+Каждая NOTES_REVISION_SNAPSHOT_EVERY-я версия хранится целиком,
+поэтому любая версия собирается не более чем из стольких записей,
+а старые версии удаляются без пересчёта остальных.
+"""
+import difflib
+import json
+
+from django.conf import settings
+
+from .models import Note, NoteRevision
+
+
+def make_delta(new, old):
+    """
+    Разница, по которой old восстанавливается из new.
+
+    Пара [начало, конец] — строки из new, строка — текст из old.
+    """
+    new_lines = new.splitlines(keepends=True)
+    old_lines = old.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, new_lines, old_lines)
+    delta = []
+    for tag, new_start, new_end, old_start, old_end in (
+        matcher.get_opcodes()
+    ):
+        if tag == 'equal':
+            delta.append([new_start, new_end])
+        elif old_start < old_end:
+            delta.append(''.join(old_lines[old_start:old_end]))
+    return json.dumps(delta, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_delta(new, delta):
+    new_lines = new.splitlines(keepends=True)
+    return ''.join(
+        ''.join(new_lines[op[0]:op[1]]) if isinstance(op, list) else op
+        for op in json.loads(delta)
+    )
+
+
+def previous_version(note):
+    """
+    Заголовок и текст заметки до текущего сохранения.
+
+    Читаются из строки в базе внутри транзакции сохранения, а не из
+    копии в памяти: разница должна строиться от версии, которую
+    сохранение действительно заменяет. Строка блокируется до конца
+    транзакции, поэтому параллельные правки выстраиваются в очередь;
+    SQLite вместо этого отвечает «database is locked», и запись
+    повторяет retry_on_locked.
+    """
+    return Note.objects.select_for_update().filter(
+        pk=note.pk
+    ).values_list('title', 'text').first()
+
+
+def record_revision(note, title, text):
+    """
+    Сохраняет прежнюю версию заметки, если она отличается от текущей.
+
+    Вызывается в транзакции сохранения после previous_version,
+    поэтому номер версии не может занять параллельная правка.
+    """
+    if (title, text) == (note.title, note.text):
+        return None
+    last = note.revisions.order_by('-number').values_list(
+        'number', flat=True
+    ).first()
+    number = (last or 0) + 1
+    is_snapshot = number % settings.NOTES_REVISION_SNAPSHOT_EVERY == 0
+    data = text if is_snapshot else make_delta(note.text, text)
+    if len(data) >= len(text):
+        # Разница не короче самого текста: хранить её незачем.
+        is_snapshot, data = True, text
+    revision = NoteRevision.objects.create(
+        note=note, number=number, title=title,
+        is_snapshot=is_snapshot, data=data,
+    )
+    if number > settings.NOTES_REVISION_LIMIT:
+        note.revisions.filter(
+            number__lte=number - settings.NOTES_REVISION_LIMIT
+        ).delete()
+    return revision
+
+
+def revision_text(note, number):
+    """
+    Текст версии number одним запросом.
+
+    Цепочка разниц идёт от версии вверх до ближайшего снимка,
+    а если его нет — до текущего текста заметки.
+    """
+    chain = []
+    revisions = note.revisions.filter(number__gte=number).order_by(
+        'number'
+    )[:settings.NOTES_REVISION_SNAPSHOT_EVERY]
+    for revision in revisions:
+        chain.append(revision)
+        if revision.is_snapshot:
+            break
+    if not chain or chain[0].number != number:
+        raise NoteRevision.DoesNotExist(
+            f'У заметки {note.slug} нет версии {number}'
+        )
+    if chain[-1].is_snapshot:
+        text = chain.pop().data
+    else:
+        text = note.text
+    for revision in reversed(chain):
+        text = apply_delta(text, revision.data)
+    return text
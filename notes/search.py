@@ -0,0 +1,209 @@
+import re
+from functools import lru_cache
+from itertools import islice
+
+from django.db import connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+# Индекс читает заметки через представление с распакованным текстом.
+# Функцию note_text() знают только соединения приложения, поэтому
+# индекс обновляет Python, а не триггеры: запись в notes_note из
+# sqlite3 или скриптов не падает, но и не попадает в поиск — после
+# неё индекс перестраивается задачей rebuild_search.
+FTS_CONTENT = 'notes_note_fts_content'
+FTS_CONTENT_SQL = f"""
+    CREATE VIEW IF NOT EXISTS {FTS_CONTENT} AS
+    SELECT id, title, note_text(text) AS text FROM notes_note
+"""
+# Маркеры подсветки не встречаются в тексте и не экранируются.
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_TOKENS = 12
+SNIPPET_CHARS = 80
+
+
+class SearchResult:
+    """Найденная заметка с фрагментом текста."""
+
+    def __init__(self, pk, slug, title, snippet):
+        self.pk = pk
+        self.slug = slug
+        self.title = title
+        self.snippet = snippet
+
+
+def _highlight(snippet):
+    html = escape(snippet)
+    html = html.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def _terms(query):
+    return re.findall(r'\w+', query)
+
+
+def _fts_query(terms):
+    """Каждое слово ищется как префикс, все слова обязательны."""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def fts_available(using='default'):
+    """Есть ли полнотекстовый индекс в базе."""
+    connection = connections[using]
+    return (
+        connection.vendor == 'sqlite'
+        and FTS_TABLE in connection.introspection.table_names()
+    )
+
+
+@lru_cache(maxsize=None)
+def _use_fts(using):
+    return fts_available(using)
+
+
+def drop_fts_content(using='default'):
+    """
+    Удаляет представление с текстом заметок перед миграциями:
+    SQLite не даёт пересоздать таблицу, на которую ссылается
+    представление.
+    """
+    if fts_available(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DROP VIEW IF EXISTS {FTS_CONTENT}')
+
+
+def ensure_fts_content(using='default'):
+    """Восстанавливает представление, удалённое на время миграций."""
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(FTS_CONTENT_SQL)
+
+
+def index_notes(rows, using='default'):
+    """Добавляет в индекс заметки из пар (id, заголовок, текст)."""
+    if not _use_fts(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE}(rowid, title, text) VALUES (%s, %s, %s)',
+            list(rows),
+        )
+
+
+def unindex_notes(rows, using='default'):
+    """
+    Убирает из индекса заметки (id, заголовок, текст).
+
+    Индекс с внешним содержимым удаляет слова по переданному тексту,
+    поэтому он должен совпадать с проиндексированным.
+    """
+    if not _use_fts(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text) "
+            f"VALUES ('delete', %s, %s, %s)",
+            list(rows),
+        )
+
+
+def rebuild_search_index(using='default'):
+    """Перестраивает полнотекстовый индекс по всем заметкам."""
+    if not fts_available(using):
+        return False
+    ensure_fts_content(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+    return True
+
+
+def _search_fts(author, terms, limit, offset, using):
+    sql = f"""
+        SELECT note.id, note.slug, note.title,
+               snippet({FTS_TABLE}, -1, %s, %s, '…', %s)
+        FROM {FTS_TABLE}
+        JOIN notes_note AS note ON note.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND note.author_id = %s
+        ORDER BY bm25({FTS_TABLE}, 10.0, 1.0)
+        LIMIT %s OFFSET %s
+    """
+    params = (
+        MARK_START, MARK_END, SNIPPET_TOKENS,
+        _fts_query(terms), author.pk, limit, offset,
+    )
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            SearchResult(pk, slug, title, _highlight(snippet))
+            for pk, slug, title, snippet in cursor.fetchall()
+        ]
+
+
+def _scan_snippet(text, terms):
+    lowered = text.lower()
+    positions = [
+        lowered.find(term.lower()) for term in terms
+        if term.lower() in lowered
+    ]
+    start = max(min(positions, default=0) - SNIPPET_CHARS // 2, 0)
+    snippet = text[start:start + SNIPPET_CHARS]
+    for term in terms:
+        snippet = re.sub(
+            f'({re.escape(term)})', rf'{MARK_START}\1{MARK_END}',
+            snippet, flags=re.IGNORECASE,
+        )
+    prefix = '…' if start else ''
+    suffix = '…' if start + SNIPPET_CHARS < len(text) else ''
+    return _highlight(prefix + snippet + suffix)
+
+
+def _matches(note, terms):
+    title, text = note.title.casefold(), note.text.casefold()
+    return all(
+        term.casefold() in title or term.casefold() in text
+        for term in terms
+    )
+
+
+def _search_scan(author, terms, limit, offset, using):
+    # Текст хранится сжатым, и LIKE в SQL по нему не работает:
+    # каждая заметка автора читается и распаковывается в Python.
+    notes = (
+        Note.objects.using(using).filter(author=author)
+        .only('id', 'slug', 'title', 'text').order_by('-id')
+    )
+    found = islice(
+        (note for note in notes.iterator() if _matches(note, terms)),
+        offset, offset + limit,
+    )
+    return [
+        SearchResult(
+            note.pk, note.slug, note.title, _scan_snippet(note.text, terms)
+        )
+        for note in found
+    ]
+
+
+def search_notes(author, query, limit, offset=0, using='default'):
+    """
+    Ищет заметки автора по заголовку и тексту.
+
+    На SQLite с FTS5 результаты упорядочены по релевантности.
+    Без FTS5 заметки автора перебираются от новых к старым
+    с распаковкой каждого текста: время поиска растёт с числом
+    заметок автора, поэтому такой режим годится только для
+    небольших баз.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    if _use_fts(using):
+        return _search_fts(author, terms, limit, offset, using)
+    return _search_scan(author, terms, limit, offset, using)
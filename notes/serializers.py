@@ -0,0 +1,23 @@
+from django.urls import reverse
+
+LIST_FIELDS = ('id', 'slug', 'title')
+DETAIL_FIELDS = ('id', 'slug', 'title', 'text', 'created_at', 'updated_at')
+# Текст ошибки задачи — трассировка для администратора, наружу не отдаётся.
+JOB_FIELDS = (
+    'id', 'kind', 'status', 'attempts', 'max_attempts', 'result',
+    'created_at', 'started_at', 'finished_at',
+)
+
+
+def note_to_dict(note, fields=DETAIL_FIELDS):
+    """Заметка в виде словаря для JSON-ответа."""
+    return {field: getattr(note, field) for field in fields}
+
+
+def job_to_dict(job):
+    """Фоновая задача со ссылками на статус и готовый файл."""
+    data = {field: getattr(job, field) for field in JOB_FIELDS}
+    data['status_url'] = reverse('notes:job', args=(job.pk,))
+    if job.status == job.DONE and (job.result or {}).get('file'):
+        data['download_url'] = reverse('notes:job_download', args=(job.pk,))
+    return data
@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_delete,
+    pre_migrate, pre_save
+)
+from django.dispatch import receiver
+
+from .auth import user_cache
+from .cache import notes_list_cache
+from .compression import register_sqlite_functions
+from .models import Note, NoteTombstone
+from .revisions import previous_version, record_revision
+from .search import (
+    drop_fts_content, ensure_fts_content, index_notes, unindex_notes
+)
+from .sync import ensure_sync_triggers
+from .tags import ensure_tag_count_triggers
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_notes_list(sender, instance, **kwargs):
+    """Сбрасывает кэш списка при изменении заметок автора."""
+    notes_list_cache.invalidate(instance.author_id)
+
+
+@receiver(post_delete, sender=Note)
+def record_tombstone(sender, instance, **kwargs):
+    """Запоминает удаление для синхронизации клиентов."""
+    NoteTombstone.objects.create(
+        author_id=instance.author_id, note_id=instance.pk, slug=instance.slug
+    )
+
+
+@receiver(pre_save, sender=Note)
+def remember_previous_version(sender, instance, raw, **kwargs):
+    # loaddata сохраняет и уже существующие заметки.
+    if raw or not instance._state.adding:
+        instance._previous_version = previous_version(instance)
+    else:
+        instance._previous_version = None
+
+
+@receiver(post_save, sender=Note)
+def record_note_revision(sender, instance, created, raw, **kwargs):
+    """Кладёт прежнюю версию заметки в историю правок."""
+    previous = instance._previous_version
+    if not created and not raw and previous is not None:
+        record_revision(instance, *previous)
+
+
+@receiver(post_save, sender=Note)
+def index_saved_note(sender, instance, using, **kwargs):
+    """Обновляет поисковый индекс в транзакции сохранения."""
+    previous = instance._previous_version
+    current = (instance.title, instance.text)
+    if previous == current:
+        return
+    if previous is not None:
+        unindex_notes([(instance.pk, *previous)], using)
+    index_notes([(instance.pk, *current)], using)
+
+
+@receiver(pre_delete, sender=Note)
+def load_indexed_text(sender, instance, **kwargs):
+    """Индексу нужен удаляемый текст, а после удаления его не прочесть."""
+    deferred = {'title', 'text'} & instance.get_deferred_fields()
+    if deferred:
+        instance.refresh_from_db(fields=deferred)
+
+
+@receiver(post_delete, sender=Note)
+def unindex_deleted_note(sender, instance, using, **kwargs):
+    unindex_notes([(instance.pk, instance.title, instance.text)], using)
+
+
+@receiver(m2m_changed, sender=Note.tags.through)
+def invalidate_tagged_list(sender, instance, action, **kwargs):
+    """
+    Сбрасывает кэш списка: в нём боковая панель со счётчиками тегов.
+
+    Сами счётчики ведут триггеры, см. notes.tags.TAG_COUNT_TRIGGERS.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        notes_list_cache.invalidate(instance.author_id)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_user_tombstones(sender, instance, **kwargs):
+    NoteTombstone.objects.filter(author_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Смена пароля или данных пользователя сбрасывает его кэш."""
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_new_user_list(sender, instance, created, **kwargs):
+    """Новый пользователь в SQLite может получить id удалённого."""
+    if created:
+        notes_list_cache.invalidate(instance.pk)
+
+
+@receiver(pre_migrate)
+def release_fts_content(sender, using, **kwargs):
+    """Освобождает таблицу заметок для миграций."""
+    if sender.name == 'notes':
+        drop_fts_content(using)
+
+
+@receiver(post_migrate)
+def restore_triggers(sender, using, **kwargs):
+    """Возвращает представление индекса и триггеры после миграций."""
+    if sender.name == 'notes':
+        ensure_fts_content(using)
+        ensure_tag_count_triggers(using)
+        ensure_sync_triggers(using)
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    register_sqlite_functions(connection.connection)
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
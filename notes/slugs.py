@@ -0,0 +1,85 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .translit import slugify
+
+DEFAULT_SLUG = 'note'
+# Место под суффикс вида -99999 у слишком длинных slug.
+SUFFIX_RESERVE = 6
+SAVE_ATTEMPTS = 3
+
+
+def _base_slug(title, max_length):
+    return slugify(title or '')[:max_length] or DEFAULT_SLUG
+
+
+def _stem(base, max_length):
+    return base[:max_length - SUFFIX_RESERVE]
+
+
+def _next_free(base, taken, max_length):
+    """Возвращает base или base-N со следующим свободным N."""
+    if base not in taken:
+        return base
+    stem = _stem(base, max_length)
+    pattern = re.compile(rf'^{re.escape(stem)}-(\d+)$')
+    suffixes = [
+        int(match.group(1))
+        for match in map(pattern.match, taken) if match
+    ]
+    return f'{stem}-{max(suffixes, default=1) + 1}'
+
+
+def allocate_slugs(model, titles, exclude_pk=None, reserved=()):
+    """
+    Подбирает уникальные slug для нескольких заголовков.
+
+    Все занятые варианты с нужными префиксами читаются
+    одним запросом, дальше суффиксы считаются в памяти.
+    Slug из reserved считаются занятыми, хотя ещё не сохранены.
+    """
+    max_length = model._meta.get_field('slug').max_length
+    bases = [_base_slug(title, max_length) for title in titles]
+    if not bases:
+        return []
+    stems = {_stem(base, max_length) for base in bases}
+    taken = set(
+        model._default_manager.filter(
+            reduce(or_, (Q(slug__startswith=stem) for stem in stems))
+        ).exclude(pk=exclude_pk).values_list('slug', flat=True)
+    )
+    taken.update(reserved)
+    slugs = []
+    for base in bases:
+        slug = _next_free(base, taken, max_length)
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def allocate_slug(model, title, exclude_pk=None):
+    """Подбирает уникальный slug для одного заголовка."""
+    return allocate_slugs(model, [title], exclude_pk)[0]
+
+
+def save_with_generated_slug(instance, save, *args, **kwargs):
+    """
+    Сохраняет объект, подбирая slug заново при гонке.
+
+    Если параллельный запрос успел занять тот же slug,
+    вставка падает с IntegrityError и повторяется с новым суффиксом.
+    """
+    model = type(instance)
+    for attempt in range(1, SAVE_ATTEMPTS + 1):
+        if not instance.slug or attempt > 1:
+            instance.slug = allocate_slug(model, instance.title, instance.pk)
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            if attempt == SAVE_ATTEMPTS:
+                raise
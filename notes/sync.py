@@ -0,0 +1,186 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Note, NoteTombstone
+from .serializers import DETAIL_FIELDS, note_to_dict
+
+# Номер изменения выдаёт триггер под блокировкой записи SQLite,
+# поэтому номера растут в порядке фиксации транзакций. Время
+# updated_at для курсора не годится: его ставит Python до фиксации,
+# и поздно зафиксированная правка оказалась бы позади курсора.
+SYNC_COUNTER = 'notes_sync_counter'
+_NEXT = f'(SELECT value FROM {SYNC_COUNTER})'
+# ORM пишет в UPDATE все поля, в том числе устаревшие номера
+# из памяти; триггер заменяет их. Рекурсивные триггеры в SQLite
+# выключены, поэтому UPDATE внутри триггера не вызывает его же,
+# а UPDATE из триггера вставки (created_seq ещё 0) пропускается
+# условием WHEN. Сохранение через ORM всегда меняет updated_at
+# (auto_now), а служебная перезапись, например recompress_notes,
+# его не трогает и не отдаёт заметки клиентам заново.
+SYNC_TRIGGERS = {
+    'notes_note_sync_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS notes_note_sync_insert
+        AFTER INSERT ON notes_note BEGIN
+            UPDATE {SYNC_COUNTER} SET value = value + 1;
+            UPDATE notes_note SET change_seq = {_NEXT}, created_seq = {_NEXT}
+            WHERE id = new.id;
+        END
+    """,
+    'notes_note_sync_update': f"""
+        CREATE TRIGGER IF NOT EXISTS notes_note_sync_update
+        AFTER UPDATE ON notes_note
+        WHEN old.created_seq <> 0
+        AND old.updated_at IS NOT new.updated_at BEGIN
+            UPDATE {SYNC_COUNTER} SET value = value + 1;
+            UPDATE notes_note
+            SET change_seq = {_NEXT}, created_seq = old.created_seq
+            WHERE id = new.id;
+        END
+    """,
+    'notes_notetombstone_sync_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS notes_notetombstone_sync_insert
+        AFTER INSERT ON notes_notetombstone BEGIN
+            UPDATE {SYNC_COUNTER} SET value = value + 1;
+            UPDATE notes_notetombstone SET change_seq = {_NEXT}
+            WHERE id = new.id;
+        END
+    """,
+}
+
+# Старые курсоры вида «время|поток|id» ведут к полной синхронизации.
+LEGACY_SEPARATOR = '|'
+
+
+def ensure_sync_triggers(using='default'):
+    """
+    Восстанавливает триггеры номеров изменений.
+
+    SQLite пересоздаёт таблицу при изменении схемы в миграциях,
+    и триггеры на ней пропадают. Без таблицы счётчика (миграция
+    0006 не применена) триггеры не нужны.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if SYNC_COUNTER not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing.issuperset(SYNC_TRIGGERS):
+            return
+        for sql in SYNC_TRIGGERS.values():
+            cursor.execute(sql)
+
+
+def encode_cursor(seq, start):
+    raw = f'{seq}:{start}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Курсор синхронизации: (номер последнего изменения, номер начала).
+
+    Номер начала — значение счётчика в момент, когда клиент начал
+    полную синхронизацию. Для старого курсора возвращается None.
+    """
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        if LEGACY_SEPARATOR in raw:
+            return None
+        seq, start = raw.split(':')
+        return int(seq), int(start)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f'Некорректный курсор: {cursor}')
+
+
+def sync_counter(using='default'):
+    """Последний выданный номер и номер, до которого стёрты следы."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'SELECT value, purged FROM {SYNC_COUNTER}')
+        row = cursor.fetchone()
+    return row or (0, 0)
+
+
+def purge_tombstones(using='default'):
+    """
+    Удаляет следы удалений старше NOTES_TOMBSTONE_KEEP.
+
+    Клиент с курсором старше удалённых следов уже не узнает
+    об удалениях, поэтому получит полную синхронизацию.
+    """
+    old = NoteTombstone.objects.using(using).filter(
+        deleted_at__lt=timezone.now() - settings.NOTES_TOMBSTONE_KEEP
+    )
+    with transaction.atomic(using=using):
+        last = old.aggregate(last=Max('change_seq'))['last']
+        if last is None:
+            return 0
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {SYNC_COUNTER} SET purged = MAX(purged, %s)',
+                (last,),
+            )
+        return old.filter(change_seq__lte=last).delete()[0]
+
+
+def _change(item, since):
+    if isinstance(item, NoteTombstone):
+        return {'action': 'deleted', 'id': item.note_id, 'slug': item.slug}
+    created = since is None or item.created_seq > since
+    return {
+        'action': 'created' if created else 'updated',
+        'note': note_to_dict(item, DETAIL_FIELDS),
+    }
+
+
+def changes_since(author, cursor, limit):
+    """
+    Изменения заметок автора после курсора.
+
+    Изменённые заметки и следы удалённых читаются по индексам
+    (author, change_seq) и сливаются в один поток по номеру
+    изменения. reset=True значит, что нужные клиенту следы удалений
+    уже стёрты: он получает все заметки заново и должен забыть
+    прежние. Следы, стёртые до начала полной синхронизации, клиенту
+    не нужны — тех заметок у него нет.
+    """
+    current, purged = sync_counter()
+    position = decode_cursor(cursor) if cursor else None
+    reset = bool(cursor) and (position is None or max(position) < purged)
+    if position is None or reset:
+        since, start = None, current
+    else:
+        since, start = position
+    notes = Note.objects.filter(author=author).order_by('change_seq')
+    tombstones = NoteTombstone.objects.filter(author=author).order_by(
+        'change_seq'
+    )
+    if since is not None:
+        notes = notes.filter(change_seq__gt=since)
+        tombstones = tombstones.filter(change_seq__gt=since)
+    notes = notes.only(*notes.DETAIL_FIELDS, 'change_seq', 'created_seq')
+    merged = sorted(
+        [*notes[:limit + 1], *tombstones[:limit + 1]],
+        key=lambda item: item.change_seq,
+    )
+    page = merged[:limit]
+    if page:
+        last = page[-1].change_seq
+    else:
+        last = current if since is None else since
+    return {
+        'changes': [_change(item, since) for item in page],
+        'cursor': encode_cursor(last, start),
+        'has_more': len(merged) > limit,
+        'reset': reset,
+    }
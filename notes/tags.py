@@ -0,0 +1,122 @@
+from django.db import connections
+from django.utils.http import urlencode
+
+from .models import Folder, Tag
+
+FILTERS = ('tag', 'folder')
+
+
+def parse_tag_names(raw):
+    """Имена тегов из строки через запятую, без повторов и пустых."""
+    names = (name.strip() for name in raw.split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+# Счётчики ведут триггеры на промежуточной таблице: они срабатывают
+# в той же транзакции при любом изменении связей — из формы, при
+# каскадном удалении пользователя и даже из sqlite3 — и не добавляют
+# запросов на каждую удалённую заметку. Другие базы отклоняет
+# проверка notes.E001 (notes.checks).
+TAGGED_TABLE = 'notes_note_tags'
+TAG_COUNT_TRIGGERS = {
+    'notes_note_tags_count_insert': """
+        CREATE TRIGGER IF NOT EXISTS notes_note_tags_count_insert
+        AFTER INSERT ON notes_note_tags BEGIN
+            UPDATE notes_tag SET note_count = note_count + 1
+            WHERE id = new.tag_id;
+        END
+    """,
+    'notes_note_tags_count_delete': """
+        CREATE TRIGGER IF NOT EXISTS notes_note_tags_count_delete
+        AFTER DELETE ON notes_note_tags BEGIN
+            UPDATE notes_tag SET note_count = note_count - 1
+            WHERE id = old.tag_id;
+        END
+    """,
+}
+RECOUNT_SQL = """
+    UPDATE notes_tag SET note_count = (
+        SELECT COUNT(*) FROM notes_note_tags
+        WHERE notes_note_tags.tag_id = notes_tag.id
+    )
+"""
+
+
+def ensure_tag_count_triggers(using='default'):
+    """
+    Восстанавливает триггеры счётчиков тегов.
+
+    SQLite пересоздаёт таблицу при изменении схемы в миграциях,
+    и триггеры на ней пропадают; тогда счётчики пересчитываются.
+    До миграции с тегами восстанавливать нечего.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if TAGGED_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing.issuperset(TAG_COUNT_TRIGGERS):
+            return
+        for sql in TAG_COUNT_TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(RECOUNT_SQL)
+
+
+def set_note_tags(note, names):
+    """
+    Привязывает к заметке теги автора с указанными именами.
+
+    Новые теги вставляются с ignore_conflicts и перечитываются:
+    параллельный запрос мог успеть создать такой же тег.
+    """
+    tags = Tag.objects.filter(author_id=note.author_id, name__in=names)
+    existing = {tag.name: tag for tag in tags}
+    missing = [name for name in names if name not in existing]
+    if missing:
+        Tag.objects.bulk_create(
+            (Tag(author_id=note.author_id, name=name) for name in missing),
+            ignore_conflicts=True,
+        )
+        existing = {tag.name: tag for tag in tags.all()}
+    note.tags.set([existing[name] for name in names])
+
+
+def get_folder(author_id, name):
+    """Папка автора с таким именем; создаётся при первом обращении."""
+    if not name:
+        return None
+    folder, _ = Folder.objects.get_or_create(author_id=author_id, name=name)
+    return folder
+
+
+def list_filters(params):
+    """Непустые фильтры списка заметок из параметров запроса."""
+    return {
+        name: params[name] for name in FILTERS if params.get(name)
+    }
+
+
+def sidebar_context(user, params):
+    """
+    Теги и папки для боковой панели списка.
+
+    Теги читаются одним запросом из маленькой таблицы
+    с уже посчитанным числом заметок.
+    """
+    filters = list_filters(params)
+    return {
+        'user_tags': Tag.objects.filter(
+            author=user, note_count__gt=0
+        ).order_by('name').values_list('name', 'note_count'),
+        'user_folders': Folder.objects.filter(
+            author=user
+        ).order_by('name').values_list('name', flat=True),
+        'active_tag': filters.get('tag', ''),
+        'active_folder': filters.get('folder', ''),
+        'filter_query': urlencode(filters),
+    }
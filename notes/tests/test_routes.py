@@ -1,10 +1,11 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import Client, TestCase
 from django.urls import reverse
 
 from notes.models import Note
+from notes.query_budget import check_query_budget
 
 User = get_user_model()
 
@@ -92,3 +93,44 @@ class TestRoutes(TestCase):
                 redirect_url = f'{login_url}?next={url}'
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+
+class TestQueryBudgets(TestCase):
+    """Набор тестов для проверки числа SQL-запросов на страницах."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Подготовка данных для тестов."""
+        cls.author = User.objects.create(username='Раст')
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', author=cls.author
+        )
+
+    def make_client(self):
+        client = Client()
+        client.force_login(self.author)
+        return client
+
+    def grow(self, size):
+        for index in range(Note.objects.count(), size):
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст', author=self.author
+            )
+
+    def test_note_pages_do_not_scale_with_notes(self):
+        """
+        Проверка, что число запросов на страницах заметок
+        не зависит от их количества.
+        """
+        urls = (
+            ('notes:list', None),
+            ('notes:detail', (self.note.slug,)),
+            ('notes:api_list', None),
+            ('notes:sync', None),
+        )
+        for name, args in urls:
+            with self.subTest(name=name):
+                check_query_budget(
+                    name, reverse(name, args=args),
+                    self.make_client, self.grow,
+                )
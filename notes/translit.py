@@ -0,0 +1,23 @@
+from functools import lru_cache
+
+from django.conf import settings
+from pytils.translit import slugify as pytils_slugify
+
+
+@lru_cache(maxsize=settings.NOTES_SLUGIFY_CACHE_SIZE)
+def slugify(text):
+    """Slugify из pytils с LRU-кэшем по исходному тексту."""
+    return pytils_slugify(text)
+
+
+def cache_stats():
+    """Размер кэша транслитерации и доля попаданий."""
+    info = slugify.cache_info()
+    total = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+        'hit_rate': info.hits / total if total else 0.0,
+    }
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from notes import views
+from notes import api, async_views, views
 
 app_name = 'notes'
 
@@ -9,7 +9,45 @@ urlpatterns = [
     path('add/', views.NoteCreate.as_view(), name='add'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
+    path(
+        'history/<slug:slug>/', views.NoteHistory.as_view(), name='history'
+    ),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('import/', views.NoteImport.as_view(), name='import'),
+    path('export/', views.NoteExport.as_view(), name='export'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('api/notes/', api.NoteListApi.as_view(), name='api_list'),
+    path(
+        'api/notes/<slug:slug>/',
+        api.NoteDetailApi.as_view(),
+        name='api_detail',
+    ),
+    path('api/batch/', api.NoteBatchApi.as_view(), name='api_batch'),
+    path('sync/', api.NoteSyncApi.as_view(), name='sync'),
+    path('jobs/', api.NoteJobListApi.as_view(), name='jobs'),
+    path('jobs/<int:pk>/', api.NoteJobApi.as_view(), name='job'),
+    path(
+        'jobs/<int:pk>/download/',
+        api.NoteJobDownload.as_view(),
+        name='job_download',
+    ),
+    path('async/notes/', async_views.notes_list, name='async_list'),
+    path(
+        'async/note/<slug:slug>/',
+        async_views.note_detail,
+        name='async_detail',
+    ),
+    path('async/search/', async_views.note_search, name='async_search'),
+    path(
+        'async/api/notes/',
+        async_views.api_notes_list,
+        name='async_api_list',
+    ),
+    path(
+        'async/api/note/<slug:slug>/',
+        async_views.api_note_detail,
+        name='async_api_detail',
+    ),
 ]
@@ -1,11 +1,34 @@
+import io
+import uuid
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
 from django.views import generic
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
-from .forms import NoteForm
-from .models import Note
+from . import conditional
+from .cache import cache_anonymous_page, notes_list_cache
+from .db import retry_on_locked
+from .exporters import CONTENT_TYPES, EXTENSIONS, export_notes
+from .forms import NoteForm, NoteUploadForm
+from .importers import NoteImporter, detect_format
+from .jobs import enqueue, job_path
+from .models import Note, NoteRevision
+from .pagination import CursorPaginationMixin
+from .ratelimit import rate_limit
+from .revisions import revision_text
+from .serializers import job_to_dict
+from .search import search_notes
+from .tags import sidebar_context
 
 
+@method_decorator(cache_anonymous_page(shared=True), name='dispatch')
 class Home(generic.TemplateView):
     """Домашняя страница."""
     template_name = 'notes/home.html'
@@ -26,34 +49,208 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
+@method_decorator(rate_limit('notes:write'), name='dispatch')
+@method_decorator(retry_on_locked, name='post')
 class NoteCreate(NoteBase, generic.CreateView):
     """Добавление заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
+@method_decorator(rate_limit('notes:write'), name='dispatch')
+@method_decorator(retry_on_locked, name='post')
 class NoteUpdate(NoteBase, generic.UpdateView):
     """Редактирование заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
 
+@method_decorator(rate_limit('notes:write'), name='dispatch')
+@method_decorator(retry_on_locked, name='post')
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
+    def get_queryset(self):
+        return super().get_queryset().for_detail()
+
 
-class NotesList(NoteBase, generic.ListView):
+@method_decorator(cache_control(private=True, no_cache=True), name='get')
+@method_decorator(
+    condition(etag_func=conditional.notes_list_etag), name='get'
+)
+class NotesList(NoteBase, CursorPaginationMixin, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    fragment_template_name = 'includes/notes_list.html'
+    paginate_by = settings.NOTES_PAGE_SIZE
+
+    def get_queryset(self):
+        return super().get_queryset().for_list().organized(
+            tag=self.request.GET.get('tag'),
+            folder=self.request.GET.get('folder'),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(sidebar_context(self.request.user, self.request.GET))
+        return context
+
+    def get(self, request, *args, **kwargs):
+        """Отдаёт список из кэша, если заметки автора не менялись."""
+        self.object_list = self.get_queryset()
+        fragment = notes_list_cache.get(request.user.pk, request.GET)
+        if fragment is None:
+            context = self.get_context_data()
+            fragment = render_to_string(
+                self.fragment_template_name, context, request
+            )
+            notes_list_cache.set(request.user.pk, request.GET, fragment)
+        else:
+            # Ленивый queryset: к базе не обращается, пока его не читают.
+            context = {'view': self, 'object_list': self.object_list}
+        context['notes_list'] = mark_safe(fragment)
+        return self.render_to_response(context)
 
 
+@method_decorator(cache_control(private=True, no_cache=True), name='get')
+@method_decorator(condition(
+    etag_func=conditional.note_etag,
+    last_modified_func=conditional.note_last_modified,
+), name='get')
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+    def get_queryset(self):
+        return super().get_queryset().for_detail()
+
+
+class NoteHistory(NoteBase, generic.DetailView):
+    """История правок заметки и текст выбранной версии."""
+    template_name = 'notes/history.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['revisions'] = self.object.revisions.defer(
+            'data'
+        ).order_by('-number')
+        number = self.request.GET.get('revision')
+        if number is not None:
+            try:
+                context['revision_text'] = revision_text(
+                    self.object, int(number)
+                )
+            except (ValueError, NoteRevision.DoesNotExist):
+                raise Http404('Такой версии нет')
+            context['revision_number'] = int(number)
+        return context
+
+
+@method_decorator(rate_limit('notes:write'), name='dispatch')
+class NoteImport(LoginRequiredMixin, generic.FormView):
+    """Массовая загрузка заметок из файла."""
+    template_name = 'notes/import.html'
+    form_class = NoteUploadForm
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        try:
+            file_format = (
+                form.cleaned_data['format'] or detect_format(upload.name)
+            )
+        except ValueError as error:
+            form.add_error('format', str(error))
+            return self.form_invalid(form)
+        if upload.size > settings.NOTES_IMPORT_BACKGROUND_SIZE:
+            return self.render_to_response(self.get_context_data(
+                form=form, job=self.enqueue_import(upload, file_format)
+            ))
+        stream = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+        result = NoteImporter(self.request.user).import_file(
+            stream, file_format
+        )
+        return self.render_to_response(
+            self.get_context_data(form=form, result=result)
+        )
+
+    def enqueue_import(self, upload, file_format):
+        """Большой файл импортируется в фоне, а не в запросе."""
+        name = f'import-{uuid.uuid4().hex}.{file_format}'
+        settings.NOTES_JOB_DIR.mkdir(parents=True, exist_ok=True)
+        with open(job_path(name), 'wb') as destination:
+            for chunk in upload.chunks():
+                destination.write(chunk)
+        # Повтор после частичного импорта создал бы дубликаты.
+        return enqueue(
+            'import_notes', {'file': name, 'format': file_format},
+            author=self.request.user, max_attempts=1,
+        )
+
+
+@method_decorator(rate_limit('notes:write'), name='dispatch')
+class NoteExport(LoginRequiredMixin, generic.View):
+    """
+    Выгрузка всех заметок пользователя.
+
+    GET отдаёт файл потоком, POST ставит выгрузку в очередь
+    и возвращает статус задачи.
+    """
+
+    def get_format(self):
+        file_format = self.request.GET.get('format', 'jsonl')
+        if file_format not in CONTENT_TYPES:
+            raise Http404(f'Неизвестный формат выгрузки: {file_format}')
+        return file_format
+
+    def post(self, request, *args, **kwargs):
+        job = enqueue(
+            'export_notes', {'format': self.get_format()}, author=request.user
+        )
+        data = job_to_dict(job)
+        return JsonResponse(
+            data, status=202, headers={'Location': data['status_url']}
+        )
+
+    def get(self, request, *args, **kwargs):
+        file_format = self.get_format()
+        response = StreamingHttpResponse(
+            export_notes(request.user, file_format),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{EXTENSIONS[file_format]}"'
+        )
+        return response
+
+
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+    paginate_by = settings.NOTES_PAGE_SIZE
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            raise Http404('Некорректный номер страницы')
+        if page < 1:
+            raise Http404('Некорректный номер страницы')
+        results = search_notes(
+            self.request.user, query,
+            limit=self.paginate_by + 1,
+            offset=(page - 1) * self.paginate_by,
+        )
+        context.update({
+            'query': query,
+            'results': results[:self.paginate_by],
+            'page': page,
+            'has_next': len(results) > self.paginate_by,
+        })
+        return context
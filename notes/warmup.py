@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from django.template import engines
+
+
+def iter_template_names(directory):
+    """Имена шаблонов каталога относительно него самого."""
+    for path in sorted(directory.rglob('*.html')):
+        yield path.relative_to(directory).as_posix()
+
+
+def warm_template_cache():
+    """
+    Компилирует все шаблоны проекта в кэш загрузчика.
+
+    Первый запрос к каждой странице не тратит время на разбор
+    цепочки base.html → includes/header.html → notes/*.html.
+    """
+    engine = engines['django'].engine
+    names = [
+        name
+        for directory in map(Path, engine.dirs)
+        for name in iter_template_names(directory)
+    ]
+    for name in names:
+        engine.get_template(name)
+    return names
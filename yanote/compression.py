@@ -0,0 +1,89 @@
+import re
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+)
+# Содержимое этих тегов оставляется как есть.
+PROTECTED_HTML = re.compile(
+    r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL
+)
+# Отступы и пустые строки схлопываются в один перевод строки.
+HTML_WHITESPACE = re.compile(r'\s*\n\s*')
+
+
+def minify_html(html):
+    """Убирает отступы шаблонов, не меняя отображения страницы."""
+    parts = []
+    position = 0
+    for match in PROTECTED_HTML.finditer(html):
+        parts.append(HTML_WHITESPACE.sub('\n', html[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(HTML_WHITESPACE.sub('\n', html[position:]))
+    return ''.join(parts)
+
+
+def is_compressible(content_type):
+    return content_type.split(';')[0].strip().startswith(COMPRESSIBLE_TYPES)
+
+
+def _quality(params):
+    for param in params:
+        key, _, value = param.strip().partition('=')
+        if key == 'q':
+            try:
+                return float(value)
+            except ValueError:
+                return 0
+    return 1
+
+
+def choose_encoding(accept_encoding):
+    """Brotli, если он установлен и его принимает клиент, иначе gzip."""
+    accepted = set()
+    for part in accept_encoding.split(','):
+        name, *params = part.split(';')
+        if _quality(params) > 0:
+            accepted.add(name.strip().lower())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compressor(encoding):
+    """Пара функций (сжать порцию, завершить поток) для кодировки."""
+    if encoding == 'br':
+        stream = brotli.Compressor(quality=settings.RESPONSE_BROTLI_QUALITY)
+        return stream.process, stream.finish
+    stream = zlib.compressobj(
+        settings.RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    return stream.compress, stream.flush
+
+
+def compress_content(content, encoding):
+    compress, finish = compressor(encoding)
+    return compress(content) + finish()
+
+
+def compress_stream(chunks, encoding):
+    compress, finish = compressor(encoding)
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
@@ -0,0 +1,159 @@
+import bisect
+import threading
+from collections import defaultdict
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Гистограмма в духе Prometheus: накопительные корзины, сумма, число."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = defaultdict(
+            lambda: {'counts': [0] * (len(buckets) + 1), 'sum': 0.0}
+        )
+        self._lock = threading.Lock()
+
+    def observe(self, view, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series[view]
+            series['counts'][index] += 1
+            series['sum'] += value
+
+    def expose(self):
+        lines = [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            series = {
+                view: (list(data['counts']), data['sum'])
+                for view, data in self._series.items()
+            }
+        for view, (counts, total) in sorted(series.items()):
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            seen = 0
+            for bound, count in zip(self.buckets, counts):
+                seen += count
+                lines.append(
+                    f'{self.name}_bucket{{view="{label}",le="{bound}"}} '
+                    f'{seen}'
+                )
+            seen += counts[-1]
+            lines.append(
+                f'{self.name}_bucket{{view="{label}",le="+Inf"}} {seen}'
+            )
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {seen}')
+        return '\n'.join(lines)
+
+
+class Counter:
+    """Счётчик в духе Prometheus: только растёт."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        with self._lock:
+            return self._value
+
+    def expose(self):
+        return '\n'.join((
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} counter',
+            f'{self.name} {self.value}',
+        ))
+
+
+class MetricsRegistry:
+    """Метрики запросов, накопленные в этом процессе."""
+
+    def __init__(self):
+        self.duration = Histogram(
+            'yanote_request_duration_seconds',
+            'Время обработки запроса.', DURATION_BUCKETS,
+        )
+        self.db_time = Histogram(
+            'yanote_db_duration_seconds',
+            'Суммарное время SQL-запросов за запрос.', DURATION_BUCKETS,
+        )
+        self.db_queries = Histogram(
+            'yanote_db_queries',
+            'Число SQL-запросов за запрос.', COUNT_BUCKETS,
+        )
+        self.render_time = Histogram(
+            'yanote_template_render_seconds',
+            'Время рендеринга шаблона.', DURATION_BUCKETS,
+        )
+        self.response_size = Histogram(
+            'yanote_response_size_bytes',
+            'Размер тела ответа.', SIZE_BUCKETS,
+        )
+        self.list_cache_hits = Counter(
+            'yanote_notes_list_cache_hits_total',
+            'Страницы списка заметок, отданные из кэша.',
+        )
+        self.list_cache_misses = Counter(
+            'yanote_notes_list_cache_misses_total',
+            'Страницы списка заметок, отрендеренные заново.',
+        )
+
+    @property
+    def histograms(self):
+        return (
+            self.duration, self.db_time, self.db_queries,
+            self.render_time, self.response_size,
+        )
+
+    @property
+    def counters(self):
+        return self.list_cache_hits, self.list_cache_misses
+
+    def observe(self, view, duration, db_time, db_queries, render_time,
+                response_size):
+        self.duration.observe(view, duration)
+        self.db_time.observe(view, db_time)
+        self.db_queries.observe(view, db_queries)
+        if render_time is not None:
+            self.render_time.observe(view, render_time)
+        if response_size is not None:
+            self.response_size.observe(view, response_size)
+
+    def expose(self):
+        return '\n'.join(
+            metric.expose() for metric in (*self.histograms, *self.counters)
+        ) + '\n'
+
+    def reset(self):
+        self.__init__()
+
+
+registry = MetricsRegistry()
+
+
+@staff_member_required
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus, только для персонала."""
+    return HttpResponse(
+        registry.expose(), content_type='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,225 @@
+import logging
+import time
+import traceback
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import (
+    choose_encoding, compress_content, compress_stream, is_compressible,
+    minify_html,
+)
+from .metrics import registry
+
+logger = logging.getLogger('yanote.queries')
+
+# Страницы, где пользовательский ввод соседствует с тайными данными.
+UNCOMPRESSED_VIEWS = frozenset(('notes:search', 'notes:async_search'))
+
+
+class QueryTimer:
+    """Считает SQL-запросы и их время через execute_wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class PerformanceMetricsMiddleware:
+    """
+    Замеры времени запроса, SQL и рендеринга шаблонов.
+
+    Включается настройкой PERFORMANCE_METRICS. Результаты уходят
+    в заголовок Server-Timing и в гистограммы yanote.metrics.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        request._render_time = None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        view = (
+            request.resolver_match.view_name
+            if request.resolver_match else 'unresolved'
+        )
+        size = None if response.streaming else len(response.content)
+        registry.observe(
+            view, duration, timer.duration, timer.count,
+            request._render_time, size,
+        )
+        timings = [
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={timer.duration * 1000:.1f};'
+            f'desc="{timer.count} queries"',
+        ]
+        if request._render_time is not None:
+            timings.append(f'render;dur={request._render_time * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+        response.render()
+        request._render_time = time.perf_counter() - started
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжатие ответов brotli или gzip.
+
+    Ответы короче RESPONSE_COMPRESSION_MIN_SIZE и уже сжатые
+    форматы (zip-выгрузка) отдаются как есть; потоковые ответы
+    сжимаются по мере выдачи.
+
+    Страницы поиска не сжимаются: в них рядом с фрагментами заметок
+    стоит запрос q из URL, который может подставить злоумышленник,
+    и длина сжатого ответа выдавала бы совпадения (атака BREACH).
+    Токен CSRF Django маскирует в каждом ответе.
+
+    MiddlewareMixin оставляет цепочку асинхронной под ASGI, поэтому
+    асинхронные страницы не занимают поток ради сжатия.
+    """
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not is_compressible(
+            response.get('Content-Type', '')
+        ):
+            return response
+        match = request.resolver_match
+        if match and match.view_name in UNCOMPRESSED_VIEWS:
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress_content(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        # Сжатое представление уже не совпадает побайтно с исходным.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class HtmlMinifyMiddleware(MiddlewareMixin):
+    """Убирает из HTML-страниц отступы шаблонов (настройка HTML_MINIFY)."""
+
+    def __init__(self, get_response):
+        if not settings.HTML_MINIFY:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith('text/html')
+        ):
+            return response
+        response.content = minify_html(
+            response.content.decode(response.charset)
+        ).encode(response.charset)
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        return response
+
+
+class DuplicateQueryMiddleware:
+    """
+    Отладка N+1: пишет в лог повторяющиеся SQL-запросы со стеком.
+
+    Включается настройкой QUERY_DEBUG. Запросы группируются
+    по тексту без параметров, так что цикл по заметкам с запросом
+    на каждой итерации виден как один повторяющийся шаблон.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        for sql, stacks in recorder.duplicates():
+            logger.warning(
+                'Запрос выполнен %d раз за %s %s:\n%s\nПервый вызов:\n%s',
+                len(stacks), request.method, request.path, sql,
+                ''.join(stacks[0]),
+            )
+        return response
+
+
+class QueryRecorder:
+    """Запоминает шаблоны SQL-запросов и место их вызова."""
+
+    def __init__(self):
+        self.stacks = defaultdict(list)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.stacks[sql].append(_project_stack())
+        return execute(sql, params, many, context)
+
+    def duplicates(self):
+        return [
+            (sql, stacks) for sql, stacks in self.stacks.items()
+            if len(stacks) > 1
+        ]
+
+
+def _project_stack():
+    """Кадры стека из кода проекта, без Django и библиотек."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+    ]
+    return traceback.format_list(frames)
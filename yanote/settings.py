@@ -1,5 +1,8 @@
+import os
+from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -21,7 +24,26 @@ INSTALLED_APPS = [
     'notes.apps.NotesConfig'
 ]
 
+# Замеры производительности запросов: PERFORMANCE_METRICS=1
+PERFORMANCE_METRICS = os.getenv('PERFORMANCE_METRICS') == '1'
+
+# Лог повторяющихся SQL-запросов со стеком вызова: QUERY_DEBUG=1
+QUERY_DEBUG = os.getenv('QUERY_DEBUG') == '1'
+
+# Сжатие ответов brotli (если установлен пакет brotli) или gzip.
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', '1') == '1'
+RESPONSE_COMPRESSION_MIN_SIZE = 512
+RESPONSE_GZIP_LEVEL = 6
+RESPONSE_BROTLI_QUALITY = 5
+
+# Удаление отступов шаблонов из HTML: HTML_MINIFY=0 отключает.
+HTML_MINIFY = os.getenv('HTML_MINIFY', '1') == '1'
+
 MIDDLEWARE = [
+    'yanote.middleware.PerformanceMetricsMiddleware',
+    'yanote.middleware.DuplicateQueryMiddleware',
+    'yanote.middleware.CompressionMiddleware',
+    'yanote.middleware.HtmlMinifyMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,11 +55,15 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yanote.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -45,10 +71,19 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Без DEBUG шаблоны компилируются один раз на процесс.
+            'loaders': (
+                TEMPLATE_LOADERS if DEBUG
+                else [('django.template.loaders.cached.Loader',
+                       TEMPLATE_LOADERS)]
+            ),
         },
     },
 ]
 
+# Компиляция всех шаблонов из templates/ при старте процесса.
+TEMPLATE_WARMUP = not DEBUG
+
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
@@ -59,6 +94,95 @@ DATABASES = {
     }
 }
 
+# Профиль базы данных для нескольких воркеров gunicorn:
+# DATABASE_PROFILE=production включает WAL, постоянные соединения
+# и ожидание снятия блокировки вместо немедленной ошибки.
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'development')
+
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 5))
+SQLITE_LOCK_RETRIES = 3
+SQLITE_LOCK_BACKOFF = 0.05
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRAGMAS = {}
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'timeout': SQLITE_BUSY_TIMEOUT},
+    })
+    SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+
+
+# Для нескольких процессов кэш списков можно вынести в файлы:
+# NOTES_CACHE_DIR=/var/tmp/yanote-cache
+NOTES_CACHE_DIR = os.getenv('NOTES_CACHE_DIR')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'notes': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes',
+    },
+}
+
+if NOTES_CACHE_DIR:
+    CACHES['notes'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': NOTES_CACHE_DIR,
+    }
+
+
+# Ограничение частоты изменяющих запросов: жетонов за период.
+# RATE_LIMIT_BACKEND=cache делит вёдра между воркерами через
+# кэш RATE_LIMIT_CACHE_ALIAS (нужен общий кэш, например файловый).
+RATE_LIMITS = {
+    'notes:write': '60/m',
+    'users:signup': '10/h',
+}
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'local')
+RATE_LIMIT_CACHE_ALIAS = 'notes'
+# За обратным прокси: HTTP_X_FORWARDED_FOR.
+RATE_LIMIT_IP_HEADER = 'REMOTE_ADDR'
+
+# Хранение сессий: db, cached_db или signed_cookies.
+SESSION_STRATEGY = os.getenv('SESSION_STRATEGY', 'db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_STRATEGY]
+if SESSION_STRATEGY == 'cached_db':
+    # В кэше памяти процесса выход из аккаунта в одном воркере
+    # не сбросил бы сессию в остальных.
+    if not NOTES_CACHE_DIR:
+        raise ImproperlyConfigured(
+            'SESSION_STRATEGY=cached_db нужен общий кэш: задайте '
+            'NOTES_CACHE_DIR'
+        )
+    SESSION_CACHE_ALIAS = 'notes'
+
+# Пользователь кэшируется в памяти процесса; 0 отключает кэш.
+# Другие процессы видят смену пароля или блокировку пользователя
+# только через AUTH_USER_CACHE_TIMEOUT секунд, поэтому кэш
+# включается явно — например, при одном процессе.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 0))
+AUTH_USER_CACHE_SIZE = 10000
+
+# ModelBackend остаётся в списке: в уже выданных сессиях
+# записан именно он.
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+if AUTH_USER_CACHE_TIMEOUT:
+    AUTHENTICATION_BACKENDS.insert(0, 'notes.auth.CachedModelBackend')
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +211,41 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_PAGE_SIZE = 20
+
+NOTES_LIST_CACHE_ALIAS = 'notes'
+NOTES_LIST_CACHE_TIMEOUT = 60 * 60
+NOTES_PAGE_CACHE_TIMEOUT = 5 * 60
+
+NOTES_SLUGIFY_CACHE_SIZE = 4096
+
+NOTES_IMPORT_CHUNK_SIZE = 500
+NOTES_EXPORT_CHUNK_SIZE = 500
+NOTES_SYNC_PAGE_SIZE = 100
+NOTES_BATCH_LIMIT = 100
+# Следы удалённых заметок для синхронизации; клиент, не заходивший
+# дольше, получает полную синхронизацию.
+NOTES_TOMBSTONE_KEEP = timedelta(days=30)
+
+# Тексты заметок длиннее порога (байт) сжимаются: zlib, lzma или None.
+NOTES_TEXT_COMPRESSION = 'zlib'
+NOTES_TEXT_COMPRESSION_THRESHOLD = 1024
+
+# История правок: каждая N-я версия хранится целиком,
+# хранится не больше NOTES_REVISION_LIMIT прежних версий.
+NOTES_REVISION_SNAPSHOT_EVERY = 10
+NOTES_REVISION_LIMIT = 50
+
+# Фоновые задачи: manage.py run_note_worker.
+NOTES_JOB_DIR = Path(os.getenv('NOTES_JOB_DIR', BASE_DIR / 'jobs'))
+NOTES_JOB_MAX_ATTEMPTS = 3
+# Пауза перед повтором, удваивается с каждой попыткой (секунды).
+NOTES_JOB_RETRY_DELAY = 30
+NOTES_JOB_TIMEOUT = 60 * 60
+NOTES_JOB_KEEP = timedelta(days=7)
+NOTES_WORKER_PROCESSES = 2
+# Как часто (секунд) главный процесс воркера обслуживает очередь.
+NOTES_WORKER_MAINTENANCE_INTERVAL = 60
+# Файлы больше этого размера (байт) импортируются в фоне.
+NOTES_IMPORT_BACKGROUND_SIZE = 1024 * 1024
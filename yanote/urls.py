@@ -4,15 +4,21 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from notes.cache import cache_anonymous_page
+from notes.ratelimit import rate_limit
+
+from .metrics import metrics_view
+
 urlpatterns = [
     path('', include('notes.urls')),
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 auth_urls = ([
     path(
         'login/',
-        auth_views.LoginView.as_view(),
+        cache_anonymous_page()(auth_views.LoginView.as_view()),
         name='login',
     ),
     path(
@@ -24,10 +30,12 @@ auth_urls = ([
     ),
     path(
         'signup/',
-        CreateView.as_view(
-            form_class=UserCreationForm,
-            success_url='/',
-            template_name='registration/signup.html',
+        rate_limit('users:signup', key='ip')(
+            cache_anonymous_page()(CreateView.as_view(
+                form_class=UserCreationForm,
+                success_url='/',
+                template_name='registration/signup.html',
+            ))
         ),
         name='signup'
     ),